@@ -4,9 +4,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Mapping, Optional
+from typing import Any, Dict, List, Literal, Mapping, Optional
 
-from pydantic import BaseModel, Field, validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    NonNegativeFloat,
+    NonNegativeInt,
+    PositiveInt,
+)
 
 from .config_center.center import ConfigCenter
 from .logging.structlog import init_logging, log_event, log_exception
@@ -15,36 +22,26 @@ from .logging.structlog import init_logging, log_event, log_exception
 class VideoSettings(BaseModel):
     """视频导出相关参数配置。"""
 
-    width: int = Field(1080, description="导出视频宽度")
-    height: int = Field(1920, description="导出视频高度")
-    fps: int = Field(24, description="导出帧率")
-    duration: float = Field(6.0, description="导出视频时长（秒）")
-    crf: int = Field(18, description="H.264 恒定质量因子")
+    model_config = ConfigDict(defer_build=True)
+
+    width: PositiveInt = Field(1080, description="导出视频宽度")
+    height: PositiveInt = Field(1920, description="导出视频高度")
+    fps: PositiveInt = Field(24, description="导出帧率")
+    duration: NonNegativeFloat = Field(6.0, description="导出视频时长（秒）")
+    crf: PositiveInt = Field(18, description="H.264 恒定质量因子")
     bitrate: Optional[str] = Field("8M", description="视频码率，可选，单位如 8M")
     audio_bitrate: str = Field("192k", description="音频码率设置")
     preset: str = Field("medium", description="FFmpeg x264 预设")
     cover_export: bool = Field(False, description="是否导出封面帧")
-    cover_timecode: float = Field(0.0, description="封面帧截取时间点（秒）")
-    vertical_safe_margin: int = Field(120, description="竖屏文字安全区边距像素")
-
-    @validator("width", "height", "fps", "crf", "vertical_safe_margin")
-    def validate_positive_int(cls, value: int) -> int:  # noqa: D401
-        """确保整数参数为正数。"""
-
-        if value <= 0:
-            raise ValueError("视频尺寸、帧率等整数参数必须大于 0")
-        return value
-
-    @validator("duration", "cover_timecode")
-    def validate_positive_float(cls, value: float) -> float:
-        if value < 0:
-            raise ValueError("视频时长或时间点不能为负数")
-        return value
+    cover_timecode: NonNegativeFloat = Field(0.0, description="封面帧截取时间点（秒）")
+    vertical_safe_margin: PositiveInt = Field(120, description="竖屏文字安全区边距像素")
 
 
 class PromptSettings(BaseModel):
     """文案池与安全过滤相关配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     extra_texts: List[str] = Field(default_factory=list, description="额外文案")
     extra_styles: List[str] = Field(default_factory=list, description="额外风格")
     extra_tags: List[str] = Field(default_factory=list, description="额外标签")
@@ -58,7 +55,9 @@ class PromptSettings(BaseModel):
 class SDBackendSettings(BaseModel):
     """Stable Diffusion 文本生图参数。"""
 
-    backend: str = Field("diffusers", description="可选 diffusers 或 webui")
+    model_config = ConfigDict(defer_build=True)
+
+    backend: Literal["diffusers", "webui"] = Field("diffusers", description="可选 diffusers 或 webui")
     model_path: Optional[Path] = Field(None, description="本地模型路径")
     vae_path: Optional[Path] = Field(None, description="VAE 模型路径")
     lora_paths: List[Path] = Field(default_factory=list, description="LoRA 路径列表")
@@ -68,32 +67,22 @@ class SDBackendSettings(BaseModel):
     seed: Optional[int] = Field(None, description="固定随机种子")
     webui_url: Optional[str] = Field(None, description="SD WebUI 接口地址")
     webui_token: Optional[str] = Field(None, description="SD WebUI 鉴权 Token")
-
-    @validator("backend")
-    def validate_backend(cls, value: str) -> str:
-        valid = {"diffusers", "webui"}
-        if value not in valid:
-            raise ValueError(f"backend 仅支持 {valid}")
-        return value
+    max_concurrency: PositiveInt = Field(2, description="批量生图时同时在途的 WebUI 请求上限")
 
 
 class AnimateSettings(BaseModel):
     """AnimateDiff / Stable Video Diffusion 参数。"""
 
-    backend: str = Field("animatediff", description="可选 animatediff 或 svd")
+    model_config = ConfigDict(defer_build=True)
+
+    backend: Literal["animatediff", "svd"] = Field("animatediff", description="可选 animatediff 或 svd")
     model_path: Optional[Path] = Field(None, description="视频模型权重路径")
     motion_module: Optional[Path] = Field(None, description="AnimateDiff 动作模块")
     num_frames: int = Field(144, description="生成帧数，24fps * 6s")
     fps: int = Field(24, description="视频模型输出帧率")
     strength: float = Field(0.65, description="运动强度/CFG")
     seed: Optional[int] = Field(None, description="随机种子")
-
-    @validator("backend")
-    def validate_backend(cls, value: str) -> str:
-        valid = {"animatediff", "svd"}
-        if value not in valid:
-            raise ValueError(f"video backend 仅支持 {valid}")
-        return value
+    emit_sidecar: bool = Field(False, description="是否额外写出 .json 元数据旁路文件，默认仅写入索引")
 
 
 # ---------------------------- 音频与通用设置 ----------------------------
@@ -102,6 +91,8 @@ class AnimateSettings(BaseModel):
 class AudioSettings(BaseModel):
     """音频/BGM 设置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     enable_bgm: bool = Field(False, description="是否自动添加静音 BGM 或提示音")
     bgm_directory: Path = Field(Path("assets/sfx"), description="BGM 目录")
     normalize: bool = Field(True, description="是否归一化音量")
@@ -111,38 +102,27 @@ class AudioSettings(BaseModel):
 class SchedulerSettings(BaseModel):
     """批量任务调度设置。"""
 
-    batch_size: int = Field(1, description="每轮生成的任务数")
-    concurrency: int = Field(1, description="并发度（受显存限制，建议串行）")
-    min_free_vram_mb: int = Field(3000, description="单个任务所需的最小空闲显存(MB)")
+    model_config = ConfigDict(defer_build=True)
+
+    batch_size: PositiveInt = Field(1, description="每轮生成的任务数")
+    concurrency: PositiveInt = Field(1, description="并发度（受显存限制，建议串行）")
+    min_free_vram_mb: NonNegativeInt = Field(3000, description="单个任务所需的最小空闲显存(MB)")
     hard_serial: bool = Field(True, description="显存不足时是否强制串行执行")
-    max_retries: int = Field(2, description="失败重试次数")
-    cooldown_sec: float = Field(3.0, description="重试前冷却时间")
+    max_retries: PositiveInt = Field(2, description="失败重试次数")
+    cooldown_sec: NonNegativeFloat = Field(3.0, description="重试前冷却时间")
     index_file: Path = Field(Path("outputs/index.jsonl"), description="产物索引 JSONL 文件路径")
     log_dir: Path = Field(Path("outputs/logs"), description="日志输出目录")
     lock_path: Path = Field(Path("locks/gpu.lock"), description="并发互斥锁文件路径")
-
-    @validator("batch_size", "concurrency", "max_retries")
-    def validate_positive(cls, value: int) -> int:
-        if value <= 0:
-            raise ValueError("批量参数必须大于 0")
-        return value
-
-    @validator("min_free_vram_mb")
-    def validate_min_vram(cls, value: int) -> int:
-        if value < 0:
-            raise ValueError("最小空闲显存需求不能为负数")
-        return value
-
-    @validator("cooldown_sec")
-    def validate_cooldown(cls, value: float) -> float:
-        if value < 0:
-            raise ValueError("冷却时间不能为负数")
-        return value
+    gpu_ids: List[NonNegativeInt] = Field(default_factory=list, description="可调度的 GPU 编号，留空时使用单一全局锁")
+    executor: Literal["process", "thread"] = Field("process", description="任务执行器类型：多进程或线程")
+    hash_algorithm: Literal["sha256", "blake3"] = Field("sha256", description="产物去重哈希算法，blake3 需安装同名依赖")
 
 
 class StorageSettings(BaseModel):
     """输入输出路径配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     output_dir: Path = Field(Path("outputs"), description="视频输出目录")
     cover_dir: Path = Field(Path("outputs/covers"), description="封面输出目录")
     frames_dir: Path = Field(Path("outputs/frames"), description="临时帧目录")
@@ -152,6 +132,8 @@ class StorageSettings(BaseModel):
 class UploaderSettings(BaseModel):
     """上传模块配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     provider: str = Field("none", description="当前启用的上传 Provider")
     target: Optional[str] = Field(None, description="目标平台标识")
     visibility: str = Field("private", description="上传后的视频可见性")
@@ -165,6 +147,8 @@ class UploaderSettings(BaseModel):
 class SafetySettings(BaseModel):
     """内容安全相关配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     enable_sensitive_scan: bool = Field(True, description="是否启用敏感词检测")
     enable_ad_scan: bool = Field(True, description="是否检测广告词")
     retry_on_violation: bool = Field(False, description="触发敏感词后是否重试抽取文案")
@@ -173,13 +157,20 @@ class SafetySettings(BaseModel):
 class RuntimeSettings(BaseModel):
     """运行时控制参数。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     seed: Optional[int] = Field(None, description="全局随机种子")
     dry_run: bool = Field(False, description="是否仅输出指令不实际调用重量模型")
+    dry_run_per_file: bool = Field(False, description="Dry-run 时是否为每张图单独写入 JSON 占位文件，默认汇总写入一个 NDJSON 清单")
+    cache_dir: Optional[Path] = Field(Path("outputs/cache/txt2img"), description="文生图结果缓存目录，留空时关闭缓存")
+    cache_max_mb: NonNegativeInt = Field(2048, description="文生图缓存容量上限(MB)，超出后淘汰最久未命中的条目")
 
 
 class FFMpegRetrySettings(BaseModel):
     """FFmpeg 专用的重试策略配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     enabled: bool = Field(True, description="是否为 FFmpeg 启用重试")
     retryable_exit_codes: List[int] = Field(
         default_factory=lambda: [1, 255],
@@ -190,39 +181,28 @@ class FFMpegRetrySettings(BaseModel):
 class RetrySettings(BaseModel):
     """统一的退避重试配置。"""
 
-    max_attempts: int = Field(3, description="最大尝试次数（包含首次调用）")
-    backoff_factor: float = Field(2.0, description="指数退避倍率")
-    jitter_ms: int = Field(150, description="附加抖动范围（毫秒）")
-    ffmpeg: FFMpegRetrySettings = Field(default_factory=FFMpegRetrySettings)
-
-    @validator("max_attempts")
-    def validate_max_attempts(cls, value: int) -> int:
-        if value <= 0:
-            raise ValueError("max_attempts 必须大于 0")
-        return value
-
-    @validator("backoff_factor")
-    def validate_backoff(cls, value: float) -> float:
-        if value < 1:
-            raise ValueError("backoff_factor 不能小于 1")
-        return value
+    model_config = ConfigDict(defer_build=True)
 
-    @validator("jitter_ms")
-    def validate_jitter(cls, value: int) -> int:
-        if value < 0:
-            raise ValueError("jitter_ms 不能为负数")
-        return value
+    max_attempts: PositiveInt = Field(3, description="最大尝试次数（包含首次调用）")
+    backoff_factor: float = Field(2.0, ge=1, description="指数退避倍率")
+    jitter_ms: NonNegativeInt = Field(150, description="附加抖动范围（毫秒）")
+    max_delay_ms: NonNegativeInt = Field(30000, description="SD 调用单次退避等待上限（毫秒）")
+    ffmpeg: FFMpegRetrySettings = Field(default_factory=FFMpegRetrySettings)
 
 
 class LoggingSettings(BaseModel):
     """结构化日志输出配置。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     jsonl_path: Path = Field(Path("outputs/logs/pipeline.jsonl"), description="JSONL 日志文件路径")
 
 
 class ConfigModel(BaseModel):
     """顶层配置模型。"""
 
+    model_config = ConfigDict(defer_build=True)
+
     video: VideoSettings = Field(default_factory=VideoSettings)
     prompts: PromptSettings = Field(default_factory=PromptSettings)
     sd: SDBackendSettings = Field(default_factory=SDBackendSettings)
@@ -237,60 +217,39 @@ class ConfigModel(BaseModel):
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineConfig:
-    """供流水线消费的配置对象。"""
+    """供流水线消费的配置对象，各配置段在构造时直接绑定为实例属性。"""
 
     model: ConfigModel
     raw_data: Dict[str, Any] = field(default_factory=dict)
-
-    @property
-    def video(self) -> VideoSettings:
-        return self.model.video
-
-    @property
-    def prompts(self) -> PromptSettings:
-        return self.model.prompts
-
-    @property
-    def sd(self) -> SDBackendSettings:
-        return self.model.sd
-
-    @property
-    def animate(self) -> AnimateSettings:
-        return self.model.animate
-
-    @property
-    def audio(self) -> AudioSettings:
-        return self.model.audio
-
-    @property
-    def scheduler(self) -> SchedulerSettings:
-        return self.model.scheduler
-
-    @property
-    def storage(self) -> StorageSettings:
-        return self.model.storage
-
-    @property
-    def uploader(self) -> UploaderSettings:
-        return self.model.uploader
-
-    @property
-    def safety(self) -> SafetySettings:
-        return self.model.safety
-
-    @property
-    def runtime(self) -> RuntimeSettings:
-        return self.model.runtime
-
-    @property
-    def retry(self) -> RetrySettings:
-        return self.model.retry
-
-    @property
-    def logging(self) -> LoggingSettings:
-        return self.model.logging
+    video: VideoSettings = field(init=False, repr=False, compare=False)
+    prompts: PromptSettings = field(init=False, repr=False, compare=False)
+    sd: SDBackendSettings = field(init=False, repr=False, compare=False)
+    animate: AnimateSettings = field(init=False, repr=False, compare=False)
+    audio: AudioSettings = field(init=False, repr=False, compare=False)
+    scheduler: SchedulerSettings = field(init=False, repr=False, compare=False)
+    storage: StorageSettings = field(init=False, repr=False, compare=False)
+    uploader: UploaderSettings = field(init=False, repr=False, compare=False)
+    safety: SafetySettings = field(init=False, repr=False, compare=False)
+    runtime: RuntimeSettings = field(init=False, repr=False, compare=False)
+    retry: RetrySettings = field(init=False, repr=False, compare=False)
+    logging: LoggingSettings = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        model = self.model
+        self.video = model.video
+        self.prompts = model.prompts
+        self.sd = model.sd
+        self.animate = model.animate
+        self.audio = model.audio
+        self.scheduler = model.scheduler
+        self.storage = model.storage
+        self.uploader = model.uploader
+        self.safety = model.safety
+        self.runtime = model.runtime
+        self.retry = model.retry
+        self.logging = model.logging
 
     @property
     def prompt_pool_path(self) -> Optional[Path]:
@@ -338,17 +297,23 @@ def load_config(config_path: Optional[Path] = None, env_path: Optional[Path] = N
     if model is None or not isinstance(model, ConfigModel):
         raise RuntimeError("配置验证失败，未能生成配置模型")
 
-    for path_attr in [
-        model.storage.output_dir,
-        model.storage.cover_dir,
-        model.storage.frames_dir,
-        model.storage.tmp_dir,
-        model.scheduler.log_dir,
-        model.scheduler.index_file.parent,
-        model.scheduler.lock_path.parent,
-        model.logging.jsonl_path.parent,
-    ]:
-        Path(path_attr).mkdir(parents=True, exist_ok=True)
+    directories = {
+        Path(path_attr)
+        for path_attr in (
+            model.storage.output_dir,
+            model.storage.cover_dir,
+            model.storage.frames_dir,
+            model.storage.tmp_dir,
+            model.scheduler.log_dir,
+            model.scheduler.index_file.parent,
+            model.scheduler.lock_path.parent,
+            model.logging.jsonl_path.parent,
+        )
+    }
+    # 先父后子创建目录，已存在的目录只需一次 stat
+    for directory in sorted(directories, key=lambda item: len(item.parts)):
+        if not directory.is_dir():
+            directory.mkdir(parents=True, exist_ok=True)
 
     init_logging(str(model.logging.jsonl_path))
     log_event("logging_initialized", path=str(model.logging.jsonl_path))
@@ -1,60 +1,175 @@
 """Unified configuration center for CLI and GUI components."""
 from __future__ import annotations
 
+import copy
+import functools
 import os
-import tempfile
 from pathlib import Path
-from types import MappingProxyType
-from typing import Any, Dict, Iterable, Mapping, MutableMapping, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Tuple
 
-import yaml
-from dotenv import load_dotenv
 from pydantic import BaseModel
 
 
+@functools.lru_cache(maxsize=None)
+def _yaml_codec() -> Tuple[Any, Any]:
+    """Import PyYAML on first use and return the preferred (Loader, Dumper) pair."""
+
+    import yaml
+
+    # Prefer the libyaml C bindings, fall back to the pure-Python implementation
+    if getattr(yaml, "__with_libyaml__", False):
+        return yaml.CSafeLoader, yaml.CSafeDumper
+    return yaml.SafeLoader, yaml.SafeDumper  # pragma: no cover - depends on how PyYAML was built
+
+
+@functools.lru_cache(maxsize=64)
+def _cached_load_yaml(path_str: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a YAML file; ``mtime_ns``/``size`` only serve as cache keys."""
+
+    import yaml
+
+    path = Path(path_str)
+    loader, _ = _yaml_codec()
+    # libyaml decodes UTF-8 itself; one read avoids chunked Python-level I/O
+    data = yaml.load(path.read_bytes(), Loader=loader) or {}
+    if not isinstance(data, MutableMapping):
+        raise TypeError(f"YAML {path} must contain a mapping at the top level")
+    return dict(data)
+
+
 def _load_yaml(path: Path) -> Dict[str, Any]:
     """Load a YAML file if it exists, returning an empty dict otherwise."""
 
-    if not path.exists():
+    try:
+        stat = path.stat()
+        cached = _cached_load_yaml(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
         return {}
-    with path.open("r", encoding="utf-8") as fp:
-        data = yaml.safe_load(fp) or {}
-        if not isinstance(data, MutableMapping):
-            raise TypeError(f"YAML {path} must contain a mapping at the top level")
-        return dict(data)
+    return copy.deepcopy(cached)
 
 
 def _merge_dict(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
-    """Recursively merge two dictionaries and return the merged result."""
+    """Deep-merge ``override`` into a copy of ``base`` and return the result.
+
+    Only sub-dicts that are actually overridden get copied; the walk uses an
+    explicit stack instead of recursion.
+    """
 
     result: Dict[str, Any] = dict(base)
-    for key, value in override.items():
-        if isinstance(value, dict) and isinstance(result.get(key), dict):
-            result[key] = _merge_dict(result[key], value)
-        else:
-            result[key] = value
+    stack = [(result, override)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            current = target.get(key)
+            if isinstance(value, dict) and isinstance(current, dict):
+                merged = dict(current)
+                target[key] = merged
+                stack.append((merged, value))
+            else:
+                target[key] = value
     return result
 
 
-def _freeze(value: Any) -> Any:
-    """Create an immutable view for the given value."""
+def _wrap(value: Any) -> Any:
+    """Return a read-only view for containers and the value itself otherwise."""
 
     if isinstance(value, dict):
-        frozen = {key: _freeze(inner) for key, inner in value.items()}
-        return MappingProxyType(frozen)
+        return FrozenView(value)
     if isinstance(value, list):
-        return tuple(_freeze(item) for item in value)
+        return FrozenSequence(value)
     return value
 
 
+class FrozenView(Mapping[str, Any]):
+    """Immutable mapping view whose nested views are created on first access."""
+
+    __slots__ = ("_data", "_children")
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+        self._data = data
+        self._children: Dict[str, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._children[key]
+        except KeyError:
+            pass
+        value = _wrap(self._data[key])
+        if value is not self._data[key]:
+            self._children[key] = value
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+
+class FrozenSequence(Sequence[Any]):
+    """Immutable sequence view over a list, wrapping nested containers lazily."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: List[Any]) -> None:
+        self._data = data
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return tuple(_wrap(item) for item in self._data[index])
+        return _wrap(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+
 def _write_yaml_atomic(path: Path, data: Mapping[str, Any]) -> None:
     """Write YAML atomically to avoid partially written files."""
 
-    path.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=str(path.parent), delete=False) as tmp:
-        yaml.safe_dump(data, tmp, allow_unicode=True, sort_keys=False)
-        temp_name = tmp.name
-    os.replace(temp_name, path)
+    import yaml
+
+    _, dumper = _yaml_codec()
+    if not path.parent.is_dir():
+        path.parent.mkdir(parents=True, exist_ok=True)
+    blob = yaml.dump(data, Dumper=dumper, allow_unicode=True, sort_keys=False, encoding="utf-8")
+    temp_path = path.with_name(f"{path.name}.tmp.{os.getpid()}")
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(blob)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    except BaseException:
+        os.close(fd)
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.close(fd)
+    os.replace(temp_path, path)
+
+
+# (environment variable, config section, config key)
+_ENV_STRING_FIELDS = (
+    ("SD_WEBUI_URL", "sd", "webui_url"),
+    ("SD_WEBUI_TOKEN", "sd", "webui_token"),
+    ("UPLOADER_API_TOKEN", "uploader", "api_token"),
+    ("APPIUM_SERVER", "uploader", "appium_server"),
+    ("APPIUM_DEVICE_NAME", "uploader", "device_name"),
+)
+_ENV_PATH_FIELDS = (
+    ("SD_MODEL_PATH", "sd", "model_path"),
+    ("ANIMATEDIFF_MODEL_PATH", "animate", "model_path"),
+    ("ANIMATEDIFF_MOTION_PATH", "animate", "motion_module"),
+    ("UPLOADER_COOKIE_PATH", "uploader", "cookie_path"),
+)
+_TRACKED_ENV = frozenset(
+    [env_key for env_key, _, _ in _ENV_STRING_FIELDS + _ENV_PATH_FIELDS] + ["GLOBAL_SEED", "DRY_RUN"]
+)
 
 
 class ConfigCenter:
@@ -64,7 +179,8 @@ class ConfigCenter:
         self._model_cls = model_cls
         self._model: Optional[BaseModel] = None
         self._raw: Dict[str, Any] = {}
-        self._frozen: Mapping[str, Any] = MappingProxyType({})
+        self._validated_raw: Optional[Dict[str, Any]] = None
+        self._frozen: Mapping[str, Any] = FrozenView({})
         self._base_paths: list[str] = ["configs/default.yaml"]
         self._extra_paths: list[str] = []
         self._env_path: Optional[Path] = Path(".env")
@@ -78,8 +194,13 @@ class ConfigCenter:
         base_paths: Optional[Iterable[str]] = None,
         extra_paths: Optional[Iterable[str]] = None,
         env_path: Optional[str] = None,
+        assume_valid: bool = False,
     ) -> Mapping[str, Any]:
-        """Load configuration files and environment overrides."""
+        """Load configuration files and environment overrides.
+
+        With ``assume_valid`` the previously validated model is reused when the
+        merged data is unchanged, skipping Pydantic validation entirely.
+        """
 
         if base_paths is not None:
             self._base_paths = [str(Path(p)) for p in base_paths]
@@ -91,6 +212,8 @@ class ConfigCenter:
             self._env_path = Path(".env")
 
         if self._env_path and self._env_path.exists():
+            from dotenv import load_dotenv
+
             load_dotenv(self._env_path, override=False)
 
         ordered_paths = self._base_paths + self._extra_paths
@@ -101,33 +224,46 @@ class ConfigCenter:
                 self._default_snapshot = yaml_data
             data = _merge_dict(data, yaml_data)
 
-        data = _merge_dict(data, self._build_env_override())
+        env_override = self._build_env_override()
+        if env_override:
+            data = _merge_dict(data, env_override)
         self._raw = data
-        self._frozen = _freeze(data)
+        self._frozen = FrozenView(data)
 
-        if self._model_cls is not None:
-            self._model = self._model_cls.model_validate(data)
-        else:
+        if self._model_cls is None:
             self._model = None
+        elif not (assume_valid and self._model is not None and data == self._validated_raw):
+            self._validated_raw = None
+            self._model = self._model_cls.model_validate(data)
+            self._validated_raw = data
 
         profiles_cfg = data.get("profiles", {})
         if isinstance(profiles_cfg, Mapping):
             directory = profiles_cfg.get("dir")
             if isinstance(directory, str) and directory:
                 self._profiles_dir = Path(directory)
-        self._profiles_dir.mkdir(parents=True, exist_ok=True)
+        if not self._profiles_dir.is_dir():
+            self._profiles_dir.mkdir(parents=True, exist_ok=True)
         return self.get()
 
     # ------------------------------------------------------------------
-    def reload(self) -> Mapping[str, Any]:
+    def reload(self, *, assume_valid: bool = False) -> Mapping[str, Any]:
         """Reload with the last used parameters."""
 
         return self.load(
             base_paths=self._base_paths,
             extra_paths=self._extra_paths,
             env_path=str(self._env_path) if self._env_path else None,
+            assume_valid=assume_valid,
         )
 
+    # ------------------------------------------------------------------
+    @staticmethod
+    def clear_cache() -> None:
+        """Drop all memoised YAML documents, forcing the next load to re-parse."""
+
+        _cached_load_yaml.cache_clear()
+
     # ------------------------------------------------------------------
     def get(self) -> Mapping[str, Any]:
         """Return an immutable view of the merged configuration."""
@@ -136,9 +272,13 @@ class ConfigCenter:
 
     # ------------------------------------------------------------------
     def get_raw(self) -> Dict[str, Any]:
-        """Return a mutable copy of the merged configuration."""
+        """Return a mutable deep copy of the merged configuration.
+
+        Nested mappings are copied too, so callers can edit the result without
+        leaking changes into the frozen view or the validated snapshot.
+        """
 
-        return dict(self._raw)
+        return copy.deepcopy(self._raw)
 
     # ------------------------------------------------------------------
     def get_model(self) -> Optional[BaseModel]:
@@ -184,11 +324,14 @@ class ConfigCenter:
     def import_profile(self, path: str) -> Path:
         """Import a profile YAML and store it under configs/NAME.yaml."""
 
+        import yaml
+
         source = Path(path)
-        if not source.exists():
-            raise FileNotFoundError(f"Profile source {source} does not exist")
-        with source.open("r", encoding="utf-8") as fp:
-            payload = yaml.safe_load(fp) or {}
+        loader, _ = _yaml_codec()
+        try:
+            payload = yaml.load(source.read_bytes(), Loader=loader) or {}
+        except FileNotFoundError as exc:
+            raise FileNotFoundError(f"Profile source {source} does not exist") from exc
         if not isinstance(payload, Mapping):
             raise TypeError("Imported profile must contain a mapping")
         profile_meta = payload.get("profile", {})
@@ -213,37 +356,27 @@ class ConfigCenter:
     def _build_env_override(self) -> Dict[str, Any]:
         """Construct overrides sourced from environment variables."""
 
-        override: Dict[str, Any] = {
-            "sd": {
-                "webui_url": os.getenv("SD_WEBUI_URL"),
-                "webui_token": os.getenv("SD_WEBUI_TOKEN"),
-                "model_path": Path(os.getenv("SD_MODEL_PATH")) if os.getenv("SD_MODEL_PATH") else None,
-            },
-            "animate": {
-                "model_path": Path(os.getenv("ANIMATEDIFF_MODEL_PATH")) if os.getenv("ANIMATEDIFF_MODEL_PATH") else None,
-                "motion_module": Path(os.getenv("ANIMATEDIFF_MOTION_PATH")) if os.getenv("ANIMATEDIFF_MOTION_PATH") else None,
-            },
-            "uploader": {
-                "api_token": os.getenv("UPLOADER_API_TOKEN"),
-                "cookie_path": Path(os.getenv("UPLOADER_COOKIE_PATH")) if os.getenv("UPLOADER_COOKIE_PATH") else None,
-                "appium_server": os.getenv("APPIUM_SERVER"),
-                "device_name": os.getenv("APPIUM_DEVICE_NAME"),
-            },
-            "runtime": {
-                "seed": int(os.getenv("GLOBAL_SEED")) if os.getenv("GLOBAL_SEED") else None,
-                "dry_run": str(os.getenv("DRY_RUN", "false")).lower() == "true",
-            },
-        }
-        # Remove None values to avoid overriding explicit configuration
-        for section in list(override.keys()):
-            cleaned: Dict[str, Any] = {}
-            for key, value in override[section].items():
-                if value is not None:
-                    cleaned[key] = value
-            if cleaned:
-                override[section] = cleaned
-            else:
-                override.pop(section)
+        env = os.environ
+        override: Dict[str, Dict[str, Any]] = {}
+        if not any(name in env for name in _TRACKED_ENV):
+            return override
+        # Only variables that are actually set end up in the override, so
+        # explicit YAML configuration is never clobbered by missing values.
+        for env_key, section, key in _ENV_STRING_FIELDS:
+            value = env.get(env_key)
+            if value is not None:
+                override.setdefault(section, {})[key] = value
+        # Path fields stay plain strings; the model coerces them during validation
+        for env_key, section, key in _ENV_PATH_FIELDS:
+            value = env.get(env_key)
+            if value:
+                override.setdefault(section, {})[key] = value
+        seed = env.get("GLOBAL_SEED")
+        if seed:
+            override.setdefault("runtime", {})["seed"] = int(seed)
+        dry_run = env.get("DRY_RUN")
+        if dry_run is not None:
+            override.setdefault("runtime", {})["dry_run"] = dry_run.lower() == "true"
         return override
 
 
@@ -1,6 +1,7 @@
 """日志工具模块。"""
 
 from .structlog import (
+    console,
     get_logger,
     init_logging,
     log_event,
@@ -9,6 +10,7 @@ from .structlog import (
 )
 
 __all__ = [
+    "console",
     "get_logger",
     "init_logging",
     "log_event",
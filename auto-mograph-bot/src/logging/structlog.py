@@ -2,30 +2,64 @@
 
 from __future__ import annotations
 
+import atexit
+import functools
 import json
 import logging
 import os
 import threading
 import time
 import traceback
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Optional
+
+if TYPE_CHECKING:  # pragma: no cover
+    from rich.console import Console
+
+try:  # noqa: SIM105
+    import orjson  # type: ignore
+except Exception:  # noqa: BLE001
+    orjson = None  # type: ignore[assignment]
 
 _DEFAULT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 _FALLBACK_LOGGER_NAME = "auto_mograph"
 _WRITE_LOCK = threading.Lock()
 _LOG_PATH: Optional[str] = None
+_LOG_FP: Optional[BinaryIO] = None
+_LOGGERS: Dict[str, logging.Logger] = {}
+_TRACEBACK_LIMIT = -20  # 负数表示仅保留最内层的若干帧
+_time = time.time
+_CONSOLE_LOCK = threading.Lock()
+
+
+class _LazyConsole:
+    """首次使用时才导入 rich 并创建 Console，省去启动阶段的导入与终端探测开销。"""
+
+    __slots__ = ("_console",)
+
+    def __init__(self) -> None:
+        self._console: Optional["Console"] = None
+
+    def _get(self) -> "Console":
+        if self._console is None:
+            with _CONSOLE_LOCK:
+                if self._console is None:
+                    from rich.console import Console
+
+                    self._console = Console()
+        return self._console
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+
+# 全进程共享的终端输出，所有模块共用同一把输出锁
+console: "Console" = _LazyConsole()  # type: ignore[assignment]
 
 
 def _ensure_fallback_logger() -> logging.Logger:
     """确保存在一个标准输出日志记录器，用于未初始化时的回退。"""
 
-    logger = logging.getLogger(_FALLBACK_LOGGER_NAME)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(_DEFAULT_FORMAT))
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-    return logger
+    return get_logger(_FALLBACK_LOGGER_NAME)
 
 
 def _json_default(value: Any) -> Any:
@@ -41,56 +75,99 @@ def _json_default(value: Any) -> Any:
     return str(value)
 
 
+def _close_log_file() -> None:
+    """关闭当前持有的日志文件句柄。"""
+
+    global _LOG_FP
+    with _WRITE_LOCK:
+        if _LOG_FP is not None:
+            _LOG_FP.close()
+            _LOG_FP = None
+
+
+atexit.register(_close_log_file)
+
+
+if orjson is not None:
+
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        """序列化为 UTF-8 JSON 字节串，优先使用 orjson。"""
+
+        return orjson.dumps(record, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+
+else:
+    _json_dumps = functools.partial(json.dumps, ensure_ascii=False, default=_json_default)
+
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        """序列化为 UTF-8 JSON 字节串，未安装 orjson 时使用标准库。"""
+
+        return _json_dumps(record).encode("utf-8")
+
+
 def init_logging(jsonl_path: str) -> None:
-    """初始化结构化日志输出位置。"""
+    """初始化结构化日志输出位置，并保持一个无缓冲的二进制追加句柄。"""
 
-    global _LOG_PATH
+    global _LOG_PATH, _LOG_FP
     if not jsonl_path:
+        _close_log_file()
         _LOG_PATH = None
         return
+    if _LOG_FP is not None and _LOG_PATH == jsonl_path:
+        return
     directory = os.path.dirname(jsonl_path)
     if directory:
         os.makedirs(directory, exist_ok=True)
-    _LOG_PATH = jsonl_path
+    handle = open(jsonl_path, "ab", buffering=0)
+    with _WRITE_LOCK:
+        previous, _LOG_FP = _LOG_FP, handle
+        _LOG_PATH = jsonl_path
+    if previous is not None:
+        previous.close()
 
 
 def _write_record(record: Dict[str, Any]) -> None:
     """写入单行 JSON 记录，必要时退回到标准日志。"""
 
-    if _LOG_PATH:
-        line = json.dumps(record, ensure_ascii=False, default=_json_default)
-        with _WRITE_LOCK:
-            with open(_LOG_PATH, "a", encoding="utf-8") as fp:
-                fp.write(line + "\n")
-    else:
-        fallback = _ensure_fallback_logger()
-        fallback.info(json.dumps(record, ensure_ascii=False, default=_json_default))
+    line = _dumps(record)
+    with _WRITE_LOCK:
+        if _LOG_FP is not None:
+            _LOG_FP.write(line + b"\n")
+            return
+    fallback = _ensure_fallback_logger()
+    fallback.info(line.decode("utf-8"))
 
 
 def log_event(event: str, **kwargs: Any) -> None:
     """输出结构化事件日志。"""
 
-    record: Dict[str, Any] = {"event": event, "ts": time.time()}
-    record.update(kwargs)
-    _write_record(record)
+    _write_record({"event": event, "ts": _time(), **kwargs})
 
 
 def log_exception(event: str, err: Exception, **kwargs: Any) -> None:
-    """输出包含异常信息与堆栈的结构化日志。"""
+    """输出包含异常信息与堆栈摘要的结构化日志。"""
 
-    trace = traceback.format_exc()
-    log_event(event, error=str(err), traceback=trace, **kwargs)
+    summary = traceback.TracebackException.from_exception(
+        err,
+        limit=_TRACEBACK_LIMIT,
+        lookup_lines=False,
+    )
+    frames = [{"file": frame.filename, "line": frame.lineno, "func": frame.name} for frame in summary.stack]
+    log_event(event, error=str(err), error_type=type(err).__name__, traceback=frames, **kwargs)
 
 
 def get_logger(name: str = _FALLBACK_LOGGER_NAME) -> logging.Logger:
-    """兼容旧接口，返回标准输出日志记录器。"""
+    """兼容旧接口，返回标准输出日志记录器，配置完成后按名称缓存。"""
 
+    logger = _LOGGERS.get(name)
+    if logger is not None:
+        return logger
     logger = logging.getLogger(name)
     if not logger.handlers:
         handler = logging.StreamHandler()
         handler.setFormatter(logging.Formatter(_DEFAULT_FORMAT))
         logger.addHandler(handler)
         logger.setLevel(logging.INFO)
+    _LOGGERS[name] = logger
     return logger
 
 
@@ -125,6 +202,7 @@ def log_resource_snapshot(
 
 
 __all__ = [
+    "console",
     "get_logger",
     "init_logging",
     "log_event",
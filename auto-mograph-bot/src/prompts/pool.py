@@ -2,18 +2,25 @@
 
 from __future__ import annotations
 
+import functools
+import math
 import random
-import time
-from dataclasses import dataclass, field
-from hashlib import md5
+from collections import OrderedDict
+from collections.abc import MutableSet
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
 
-from rich.console import Console
+try:  # noqa: SIM105
+    import ahocorasick  # type: ignore
+except Exception:  # noqa: BLE001
+    ahocorasick = None  # type: ignore[assignment]
 
-from ..logging.structlog import log_event
+from ..logging.structlog import console, log_event
+from . import pool_accel
 
-console = Console()
+_Matcher = Callable[[str], bool]
+_MAX_USED_KEYS = 100_000  # 去重记录上限，超出后淘汰最久未使用的组合
 
 
 DEFAULT_TOPICS: Sequence[str] = (
@@ -58,6 +65,95 @@ class PromptCandidate:
     seed: int
 
 
+class _LRUSet(MutableSet):
+    """容量受限的有序集合，超出上限时淘汰最久未使用的元素。"""
+
+    __slots__ = ("_items", "maxsize")
+
+    def __init__(self, maxsize: int = _MAX_USED_KEYS) -> None:
+        self._items: "OrderedDict[Any, None]" = OrderedDict()
+        self.maxsize = maxsize
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: Any) -> None:
+        items = self._items
+        if item in items:
+            items.move_to_end(item)
+            return
+        items[item] = None
+        while len(items) > self.maxsize:
+            items.popitem(last=False)
+
+    def discard(self, item: Any) -> None:
+        self._items.pop(item, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class _IndexPermutation:
+    """range(size) 的惰性伪随机排列：Feistel 网络加循环游走，O(1) 内存逐个给出不重复的下标。"""
+
+    __slots__ = ("size", "shape", "position", "_half_bits", "_mask", "_keys")
+
+    _ROUNDS = 4
+    _MULTIPLIER = 0x9E3779B97F4A7C15
+
+    def __init__(self, shape: Tuple[int, int], rnd: random.Random) -> None:
+        self.shape = shape
+        self.size = shape[0] * shape[1]
+        # 置换域取不小于 size 的 2 的偶数次幂，左右两半等宽
+        bits = max(2, (self.size - 1).bit_length())
+        bits += bits & 1
+        self._half_bits = bits // 2
+        self._mask = (1 << self._half_bits) - 1
+        self.reshuffle(rnd)
+
+    @property
+    def exhausted(self) -> bool:
+        return self.position >= self.size
+
+    def reshuffle(self, rnd: random.Random) -> None:
+        """以新的轮密钥开始下一轮排列。"""
+
+        self._keys = tuple(rnd.getrandbits(64) for _ in range(self._ROUNDS))
+        self.position = 0
+
+    def _permute(self, value: int) -> int:
+        half, mask = self._half_bits, self._mask
+        left, right = value >> half, value & mask
+        for key in self._keys:
+            mixed = (((right ^ key) * self._MULTIPLIER) >> 29) & mask
+            left, right = right, left ^ mixed
+        return (left << half) | right
+
+    def next(self) -> int:
+        value = self._permute(self.position)
+        # 置换域大于 size 时沿置换环继续游走，直到落回 [0, size)，仍保持一一对应
+        while value >= self.size:
+            value = self._permute(value)
+        self.position += 1
+        return value
+
+
+@dataclass(frozen=True, slots=True)
+class _WordIndex:
+    """词表的预处理结果，词表经 add_* 方法变更时由其失效并惰性重建。"""
+
+    lowered: Tuple[str, ...]
+    ascii_words: Tuple[str, ...]
+    exact: FrozenSet[str]
+    matcher: Optional[_Matcher]
+
+
 @dataclass
 class PromptPool:
     """文案池管理器，负责去重抽样与敏感词过滤。"""
@@ -65,61 +161,174 @@ class PromptPool:
     texts: List[str] = field(default_factory=lambda: list(DEFAULT_TOPICS))
     styles: List[str] = field(default_factory=lambda: list(DEFAULT_STYLES))
     tags: List[str] = field(default_factory=lambda: list(DEFAULT_TAGS))
+    # 以下词表请通过 add_* 方法修改，匹配索引依赖这些方法失效
     blacklist: Set[str] = field(default_factory=set)
     sensitive_words: Set[str] = field(default_factory=lambda: set(DEFAULT_SENSITIVE))
     ad_words: Set[str] = field(default_factory=lambda: set(AD_KEYWORDS))
-    used_hashes: Set[str] = field(default_factory=set, init=False, repr=False)
+    used_hashes: _LRUSet = field(default_factory=_LRUSet, init=False, repr=False)
+    _rng: random.Random = field(default_factory=random.Random, init=False, repr=False, compare=False)
+    _order: Optional[_IndexPermutation] = field(default=None, init=False, repr=False, compare=False)
+    _word_cache: Dict[str, _WordIndex] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @staticmethod
+    def _sanitize(values: Iterable[str]) -> List[str]:
+        """去除首尾空白并丢弃空条目。"""
+
+        return [item for item in map(str.strip, filter(None, values)) if item]
 
     def extend_texts(self, values: Iterable[str]) -> None:
         """追加额外主题文本，自动去除空行。"""
 
-        self.texts.extend([item.strip() for item in values if item and item.strip()])
+        self.texts.extend(self._sanitize(values))
 
     def extend_styles(self, values: Iterable[str]) -> None:
         """追加额外风格描述。"""
 
-        self.styles.extend([item.strip() for item in values if item and item.strip()])
+        self.styles.extend(self._sanitize(values))
 
     def extend_tags(self, values: Iterable[str]) -> None:
         """追加额外标签。"""
 
-        self.tags.extend([item.strip() for item in values if item and item.strip()])
+        self.tags.extend(self._sanitize(values))
 
     def add_blacklist(self, values: Iterable[str]) -> None:
         """添加黑名单主题关键字。"""
 
-        self.blacklist.update(item.strip() for item in values if item and item.strip())
+        self._update_words("blacklist", self.blacklist, values)
 
     def add_sensitive_words(self, values: Iterable[str]) -> None:
         """添加敏感词库。"""
 
-        self.sensitive_words.update(item.strip() for item in values if item and item.strip())
+        self._update_words("sensitive", self.sensitive_words, values)
 
-    def reset_usage(self) -> None:
-        """清空历史抽样，通常用于批量任务结束后。"""
+    def _update_words(self, category: str, words: Set[str], values: Iterable[str]) -> None:
+        """追加词条，词表确有变化时丢弃该类别的匹配索引；sample() 每次重复追加同一批词不会触发重建。"""
 
-        self.used_hashes.clear()
+        before = len(words)
+        words.update(self._sanitize(values))
+        if len(words) != before:
+            self._word_cache.pop(category, None)
 
-    def _is_blacklisted(self, text: str) -> bool:
-        lower = text.lower()
-        return any(word.lower() in lower for word in self.blacklist)
+    def copy(self) -> "PromptPool":
+        """复制素材与词表并复用已构建的匹配索引，抽样状态（去重记录等）彼此独立。"""
 
-    def _contains_sensitive(self, text: str) -> bool:
-        combined = text.lower()
-        return any(word.lower() in combined for word in self.sensitive_words)
+        clone = replace(
+            self,
+            texts=list(self.texts),
+            styles=list(self.styles),
+            tags=list(self.tags),
+            blacklist=set(self.blacklist),
+            sensitive_words=set(self.sensitive_words),
+            ad_words=set(self.ad_words),
+        )
+        clone._word_cache.update(self._word_cache)
+        return clone
+
+    def warm_up(self) -> None:
+        """预先构建黑名单、敏感词与广告词的匹配索引，便于 copy() 后共享。"""
+
+        self._word_index("blacklist", self.blacklist)
+        self._word_index("sensitive", self.sensitive_words)
+        self._word_index("ad", self.ad_words)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """序列化时丢弃随机数状态与匹配索引（含不可序列化的闭包），由接收方重建。"""
 
-    def _contains_ad(self, text: str) -> bool:
-        combined = text.lower()
-        return any(word.lower() in combined for word in self.ad_words)
+        state = self.__dict__.copy()
+        state.pop("_rng", None)
+        state.pop("_word_cache", None)
+        return state
 
-    def _build_hash(self, prompt: str, style: str, tags: Sequence[str]) -> str:
-        raw = "|".join([prompt, style, ",".join(tags)])
-        return md5(raw.encode("utf-8")).hexdigest()
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._rng = random.Random()
+        self._word_cache = {}
 
-    def _truncate(self, text: str, max_len: int) -> str:
+    def reset_usage(self) -> None:
+        """清空历史抽样，通常用于批量任务结束后。"""
+
+        self.used_hashes.clear()
+        self._order = None
+
+    def _pair_order(self, seed: Optional[int], rnd: random.Random) -> _IndexPermutation:
+        """返回（主题, 风格）组合的抽取顺序：带种子时每次新建，结果只取决于种子；否则跨调用沿用同一轮排列。"""
+
+        shape = (len(self.texts), max(1, len(self.styles)))
+        if seed is not None:
+            return _IndexPermutation(shape, rnd)
+        if self._order is None or self._order.shape != shape:
+            self._order = _IndexPermutation(shape, self._rng)
+        return self._order
+
+    @staticmethod
+    def _draw_pair(order: _IndexPermutation, rnd: random.Random) -> Tuple[int, int]:
+        """按排列取出本轮尚未抽过的一组（主题, 风格）下标，一轮抽完后重新洗牌。"""
+
+        if order.exhausted:
+            order.reshuffle(rnd)
+        return divmod(order.next(), order.shape[1])
+
+    def _word_index(self, category: str, words: Set[str]) -> _WordIndex:
+        """返回词表的预处理结果（小写副本、精确集合、编译后的匹配函数），缓存失效后惰性重建。
+
+        优先使用 pyahocorasick；未安装时若词表足够大且可用 numba，则改用字节级加速扫描；
+        两者都不可用时匹配函数为 None，由调用方回退到逐词子串扫描。
+        """
+
+        cached = self._word_cache.get(category)
+        if cached is not None:
+            return cached
+        lowered = tuple(dict.fromkeys(filter(None, (word.lower() for word in words))))
+        matcher: Optional[_Matcher] = None
+        if ahocorasick is not None and lowered:
+            automaton = ahocorasick.Automaton()
+            for word in lowered:
+                automaton.add_word(word, word)
+            automaton.make_automaton()
+            matcher = lambda text_lc: next(automaton.iter(text_lc), None) is not None  # noqa: E731
+        elif pool_accel.AVAILABLE and len(lowered) >= pool_accel.MIN_WORDS:
+            tables = pool_accel.build_tables(lowered)
+            if tables is not None:
+                matcher = functools.partial(pool_accel.contains, tables)
+        index = _WordIndex(
+            lowered=lowered,
+            ascii_words=tuple(word for word in lowered if word.isascii()),
+            exact=frozenset(word for word in lowered if word.isalnum()),
+            matcher=matcher,
+        )
+        self._word_cache[category] = index
+        return index
+
+    def _matches(self, category: str, words: Set[str], text_lc: str) -> bool:
+        """判断已转小写的文本是否包含词表中的任意词。"""
+
+        index = self._word_index(category, words)
+        exact = index.exact
+        # 先按空白切词做精确命中，未命中再回到子串匹配，语义保持不变
+        if exact and (text_lc in exact or not exact.isdisjoint(text_lc.split())):
+            return True
+        if index.matcher is not None:
+            return index.matcher(text_lc)
+        # 纯 ASCII 文本不可能包含非 ASCII 词条，只需扫描 ASCII 子集
+        candidates = index.ascii_words if text_lc.isascii() else index.lowered
+        return any(word in text_lc for word in candidates)
+
+    def _is_blacklisted(self, text_lc: str) -> bool:
+        return self._matches("blacklist", self.blacklist, text_lc)
+
+    def _contains_sensitive(self, text_lc: str) -> bool:
+        return self._matches("sensitive", self.sensitive_words, text_lc)
+
+    def _contains_ad(self, text_lc: str) -> bool:
+        return self._matches("ad", self.ad_words, text_lc)
+
+    @staticmethod
+    def _truncate(text: str, max_len: int) -> str:
         if len(text) <= max_len:
             return text
-        return text[: max(0, max_len - 1)] + "…"
+        if max_len <= 1:
+            return "…"
+        return text[: max_len - 1] + "…"
 
     def sample(
         self,
@@ -136,7 +345,7 @@ class PromptPool:
         if isinstance(additional_blacklist, (list, tuple, set)):
             self.add_blacklist(additional_blacklist)
 
-        max_retries = int(cfg.get("max_retries", 10) or 1)
+        max_retries = int(cfg.get("max_retries", 5) or 1)
         stats_enabled = bool(cfg.get("stats_log", True))
         fallback_cfg = cfg.get("fallback") if isinstance(cfg.get("fallback"), Mapping) else {}
         safe_words = cfg.get("safe_words") if isinstance(cfg.get("safe_words"), (list, tuple, set)) else []
@@ -151,8 +360,18 @@ class PromptPool:
         }
         last_reason: Optional[str] = None
 
-        rnd = random.Random(seed or time.time_ns())
+        rnd = random.Random(seed) if seed is not None else self._rng
+        order = self._pair_order(seed, rnd)
         attempts_allowed = max(1, max_retries)
+        tag_count = min(max_tags, len(self.tags))
+        space = len(self.texts) * max(1, len(self.styles)) * math.perm(len(self.tags), max(0, tag_count))
+        self.used_hashes.maxsize = min(max(1024, 4 * space), _MAX_USED_KEYS)
+        if self.texts and len(self.used_hashes) >= space:
+            # 全部组合均已用过，继续重试只会命中去重
+            stats["resource_exhausted"] += 1
+            last_reason = "pool_exhausted"
+            attempts_allowed = 0
+            log_event("pool_exhausted", used=len(self.used_hashes), space=space)
         for _ in range(attempts_allowed):
             stats["tries_total"] += 1
             if not self.texts:
@@ -160,18 +379,25 @@ class PromptPool:
                 last_reason = "empty_pool"
                 break
 
-            base_text = rnd.choice(self.texts)
-            if self._is_blacklisted(base_text):
+            text_idx, style_idx = self._draw_pair(order, rnd)
+            base_text = self.texts[text_idx]
+            if self._is_blacklisted(base_text.lower()):
                 stats["hits_blacklist"] += 1
                 last_reason = "hits_blacklist"
                 continue
 
-            style = rnd.choice(self.styles) if self.styles else ""
-            tag_candidates = rnd.sample(self.tags, k=min(max_tags, len(self.tags))) if self.tags else []
-            prompt_parts = [base_text, style, ", ".join(tag_candidates[:3])]
-            prompt = " | ".join([part for part in prompt_parts if part])
-            prompt_hash = self._build_hash(base_text, style, tag_candidates)
-            if prompt_hash in self.used_hashes:
+            style = self.styles[style_idx] if self.styles else ""
+            tag_candidates = rnd.sample(self.tags, k=max(0, tag_count)) if self.tags else []
+            if len(tag_candidates) >= 3:
+                tag_str = f"{tag_candidates[0]}, {tag_candidates[1]}, {tag_candidates[2]}"
+            else:
+                tag_str = ", ".join(tag_candidates)
+            if style and tag_str:
+                prompt = f"{base_text} | {style} | {tag_str}"
+            else:
+                prompt = " | ".join(filter(None, (base_text, style, tag_str)))
+            prompt_key = (base_text, style, tuple(tag_candidates))
+            if prompt_key in self.used_hashes:
                 stats["resource_exhausted"] += 1
                 last_reason = "resource_exhausted"
                 continue
@@ -182,19 +408,25 @@ class PromptPool:
                 max_desc,
             )
             combined = " ".join([prompt, title, desc])
-            if self._contains_sensitive(combined):
+            combined_lc = combined.lower()
+            if self._contains_sensitive(combined_lc):
                 stats["hits_sensitive"] += 1
                 last_reason = "hits_sensitive"
                 continue
-            if self._contains_ad(desc):
+            # desc 位于 combined 末尾，小写后长度不变时直接切片复用
+            if len(combined_lc) == len(combined):
+                desc_lc = combined_lc[len(combined) - len(desc):]
+            else:
+                desc_lc = desc.lower()
+            if self._contains_ad(desc_lc):
                 stats.setdefault("hits_ad", 0)
                 stats["hits_ad"] += 1
                 last_reason = "hits_ad"
                 continue
 
             tags = [tag for tag in tag_candidates[:max_tags] if tag]
-            self.used_hashes.add(prompt_hash)
-            final_seed = seed if seed is not None else rnd.randint(0, 2**32 - 1)
+            self.used_hashes.add(prompt_key)
+            final_seed = seed if seed is not None else rnd.getrandbits(32)
             candidate = PromptCandidate(prompt=prompt, title=title, description=desc, tags=tags, seed=final_seed)
             if stats_enabled:
                 log_event(
@@ -234,6 +466,44 @@ class PromptPool:
         log_event("prompt_sample_exhausted", stats=stats, reason=last_reason)
         raise RuntimeError("多次尝试后仍无法抽取安全文案，请检查敏感词配置或补充素材。")
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _fallback_core(
+        prompt_text: str,
+        title: str,
+        description: str,
+        tags: Tuple[str, ...],
+        safe_tokens: Tuple[str, ...],
+        max_title: int,
+        max_desc: int,
+        max_tags: int,
+    ) -> Tuple[str, str, str, Tuple[str, ...], Optional[Tuple[str, str, Tuple[str, ...]]]]:
+        """根据规范化后的回退配置生成文案，结果按输入缓存；最后一项为截断前的原文（未截断时为 None）。"""
+
+        base_prompt = prompt_text
+        seen: Set[str] = set()
+        fallback_tags: List[str] = []
+        for tag in tags:
+            if tag not in seen:
+                seen.add(tag)
+                fallback_tags.append(tag)
+        if safe_tokens:
+            extra_segment = " ".join(safe_tokens)
+            if extra_segment not in base_prompt:
+                base_prompt = f"{base_prompt} | {extra_segment}" if base_prompt else extra_segment
+            for token in safe_tokens:
+                if token not in seen and len(fallback_tags) < max_tags:
+                    seen.add(token)
+                    fallback_tags.append(token)
+
+        trimmed_title = PromptPool._truncate(title, max_title)
+        trimmed_desc = PromptPool._truncate(description, max_desc)
+        trimmed_tags = tuple(fallback_tags[:max_tags])
+        original = None
+        if trimmed_title != title or trimmed_desc != description or len(trimmed_tags) != len(fallback_tags):
+            original = (title, description, tuple(fallback_tags))
+        return base_prompt, trimmed_title, trimmed_desc, trimmed_tags, original
+
     def _build_fallback_candidate(
         self,
         fallback_cfg: Mapping[str, object],
@@ -245,65 +515,49 @@ class PromptPool:
     ) -> PromptCandidate:
         """构建回退使用的 PromptCandidate。"""
 
-        base_prompt = str(fallback_cfg.get("prompt_text", "") or "").strip()
-        fallback_title = str(fallback_cfg.get("title", "安全默认文案") or "安全默认文案").strip()
-        fallback_desc = str(fallback_cfg.get("description", "") or "").strip()
-        fallback_tags = list(
-            dict.fromkeys(
-                str(item).strip()
-                for item in fallback_cfg.get("tags", [])
-                if isinstance(item, str) and item.strip()
-            )
+        prompt, title, desc, tags, original = self._fallback_core(
+            str(fallback_cfg.get("prompt_text", "") or "").strip(),
+            str(fallback_cfg.get("title", "安全默认文案") or "安全默认文案").strip(),
+            str(fallback_cfg.get("description", "") or "").strip(),
+            tuple(item.strip() for item in fallback_cfg.get("tags", []) if isinstance(item, str) and item.strip()),
+            tuple(item.strip() for item in safe_words if isinstance(item, str) and item.strip()),
+            max_title,
+            max_desc,
+            max_tags,
         )
 
-        safe_tokens = [str(item).strip() for item in safe_words if isinstance(item, str) and item.strip()]
-        if safe_tokens:
-            extra_segment = " ".join(safe_tokens)
-            if extra_segment not in base_prompt:
-                base_prompt = f"{base_prompt} | {extra_segment}" if base_prompt else extra_segment
-            for token in safe_tokens:
-                if token not in fallback_tags and len(fallback_tags) < max_tags:
-                    fallback_tags.append(token)
-
-        trimmed_title = self._truncate(fallback_title, max_title)
-        trimmed_desc = self._truncate(fallback_desc, max_desc)
-        trimmed_tags = fallback_tags[:max_tags]
-
-        if (
-            trimmed_title != fallback_title
-            or trimmed_desc != fallback_desc
-            or len(trimmed_tags) != len(fallback_tags)
-        ):
+        if original is not None:
             log_event(
                 "prompt_fallback_trimmed",
                 original={
-                    "title": fallback_title,
-                    "description": fallback_desc,
-                    "tags": fallback_tags,
+                    "title": original[0],
+                    "description": original[1],
+                    "tags": list(original[2]),
                 },
                 trimmed={
-                    "title": trimmed_title,
-                    "description": trimmed_desc,
-                    "tags": trimmed_tags,
+                    "title": title,
+                    "description": desc,
+                    "tags": list(tags),
                 },
             )
 
-        final_seed = seed if seed is not None else random.randint(0, 2**32 - 1)
+        final_seed = seed if seed is not None else random.getrandbits(32)
         return PromptCandidate(
-            prompt=base_prompt,
-            title=trimmed_title,
-            description=trimmed_desc,
-            tags=trimmed_tags,
+            prompt=prompt,
+            title=title,
+            description=desc,
+            tags=list(tags),
             seed=final_seed,
         )
 
     def load_from_file(self, path: Path) -> None:
         """从文本文件加载额外文案，每行一条。"""
 
-        if not path.exists():
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                self.extend_texts(handle)
+        except FileNotFoundError:
             return
-        lines = [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
-        self.extend_texts(lines)
 
 
 def load_prompt_pool(pool_path: Optional[Path] = None, extra_texts: Optional[Iterable[str]] = None) -> PromptPool:
@@ -0,0 +1,111 @@
+"""文案池词表扫描的可选 Numba 加速实现，在 UTF-8 字节上运行 Aho-Corasick。"""
+
+from __future__ import annotations
+
+import importlib.util
+from collections import deque
+from typing import Any, Iterable, List, Optional, Tuple
+
+# 仅探测是否安装，numpy/numba 导入较重，推迟到首次构建表时再加载
+AVAILABLE = importlib.util.find_spec("numpy") is not None and importlib.util.find_spec("numba") is not None
+MIN_WORDS = 64  # 词表较小时 Python 子串扫描更快，不值得构建表
+
+Tables = Tuple[Any, Any, Any]
+
+np: Any = None
+_scan: Any = None
+
+
+def _scan_py(data, byte_class, goto, out):  # pragma: no cover - 由 numba 编译执行
+    state = 0
+    for index in range(data.shape[0]):
+        state = goto[state, byte_class[data[index]]]
+        if out[state]:
+            return True
+    return False
+
+
+def _load() -> bool:
+    """首次使用时导入 numpy 并编译扫描函数，导入失败返回 False。"""
+
+    global np, _scan
+    if _scan is not None:
+        return True
+    try:
+        import numpy  # type: ignore
+        from numba import njit  # type: ignore
+    except Exception:  # noqa: BLE001
+        return False
+    np, _scan = numpy, njit(cache=True)(_scan_py)
+    return True
+
+
+def build_tables(words: Iterable[str]) -> Optional[Tables]:
+    """构建字节类映射、完全 goto 表与命中标记，未安装 numba 或词表为空时返回 None。"""
+
+    if not AVAILABLE or not _load():
+        return None
+    patterns = [word.encode("utf-8") for word in words if word]
+    if not patterns:
+        return None
+
+    # 仅为词表中出现过的字节分配类别，其余字节共用类别 0，以压缩表宽
+    byte_class = [0] * 256
+    used = sorted({byte for pattern in patterns for byte in pattern})
+    for column, value in enumerate(used, start=1):
+        byte_class[value] = column
+    width = len(used) + 1
+
+    goto: List[List[int]] = [[-1] * width]
+    out: List[bool] = [False]
+    for pattern in patterns:
+        state = 0
+        for byte in pattern:
+            column = byte_class[byte]
+            nxt = goto[state][column]
+            if nxt < 0:
+                nxt = len(goto)
+                goto.append([-1] * width)
+                out.append(False)
+                goto[state][column] = nxt
+            state = nxt
+        out[state] = True
+
+    # 按 BFS 顺序计算失败指针，并把缺失转移补全为确定性自动机
+    fail = [0] * len(goto)
+    queue: deque = deque()
+    root = goto[0]
+    for column in range(width):
+        if root[column] < 0:
+            root[column] = 0
+        else:
+            queue.append(root[column])
+    while queue:
+        state = queue.popleft()
+        row = goto[state]
+        fallback = goto[fail[state]]
+        for column in range(width):
+            nxt = row[column]
+            if nxt < 0:
+                row[column] = fallback[column]
+            else:
+                fail[nxt] = fallback[column]
+                out[nxt] = out[nxt] or out[fail[nxt]]
+                queue.append(nxt)
+
+    return (
+        np.asarray(byte_class, dtype=np.int32),
+        np.asarray(goto, dtype=np.int32),
+        np.asarray(out, dtype=np.bool_),
+    )
+
+
+def contains(tables: Tables, text_lc: str) -> bool:
+    """判断文本中是否出现任意词条，tables 由 build_tables 生成。"""
+
+    byte_class, goto, out = tables
+    data = np.frombuffer(text_lc.encode("utf-8"), dtype=np.uint8)
+    return bool(_scan(data, byte_class, goto, out))
+
+
+__all__ = ["AVAILABLE", "MIN_WORDS", "build_tables", "contains"]
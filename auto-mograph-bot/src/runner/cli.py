@@ -5,13 +5,10 @@ from __future__ import annotations
 import argparse
 from pathlib import Path
 
-from rich.console import Console
-
+from ..logging import console
 from .job import GenerationJob
 from .scheduler import GenerationScheduler
 
-console = Console()
-
 
 def parse_args() -> argparse.Namespace:
     """解析命令行参数。"""
@@ -28,14 +25,16 @@ def main() -> None:
     args = parse_args()
     base_job = GenerationJob.from_config(args.config)
     config = base_job.config
-    prompt_pool = base_job.prompt_pool
 
     def job_factory() -> GenerationJob:
-        return GenerationJob(config=config, prompt_pool=prompt_pool)
+        return base_job
 
     scheduler = GenerationScheduler(config=config, job_factory=job_factory)
     console.rule(f"批量生成 {args.count} 个任务")
-    scheduler.run(args.count)
+    try:
+        scheduler.run(args.count)
+    finally:
+        scheduler.close()
 
 
 if __name__ == "__main__":
@@ -2,18 +2,28 @@
 
 from __future__ import annotations
 
+import errno
+import functools
 import hashlib
+import mmap
+import os
 import re
 import shutil
+import threading
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
-from rich.console import Console
+try:  # noqa: SIM105
+    import blake3  # type: ignore
+except Exception:  # noqa: BLE001
+    blake3 = None  # type: ignore[assignment]
 
 from ..config import PipelineConfig, load_config
+from ..logging import console
 from ..prompts.pool import PromptCandidate, PromptPool, load_prompt_pool
 from ..sd.img2vid import Img2VidGenerator
 from ..sd.txt2img import Txt2ImgGenerator
@@ -21,14 +31,150 @@ from ..uploader.interfaces import DraftResult, UploadMetadata
 from ..uploader.router import upload_video
 from ..video.postprocess import auto_postprocess
 
-console = Console()
+_HASH_BUFFER_SIZE = 2 << 20
+_HASH_SINGLE_SHOT_LIMIT = 2 << 30  # 不超过该大小的文件整体映射后一次性哈希
+# "-" 本身不在保留字符内，连续的分隔符（含原有的 "-"）一次替换即可折叠为单个 "-"
+_SLUG_RE = re.compile(r"[^0-9A-Za-z\u4e00-\u9fff]+")
+_RESPONSE_CACHE_SIZE = 1024
+
+_CacheKey = Tuple[str, str, str, int, str, str]
+
+
+# 同一 Prompt 与种子已成功完成的任务结果，命中时直接返回，既不重复生成也不重复上传
+_RESPONSE_CACHE: "OrderedDict[_CacheKey, JobResult]" = OrderedDict()
+_RESPONSE_LOCK = threading.Lock()
+
+
+def _response_cache_get(key: _CacheKey) -> Optional["JobResult"]:
+    with _RESPONSE_LOCK:
+        entry = _RESPONSE_CACHE.get(key)
+        if entry is not None:
+            _RESPONSE_CACHE.move_to_end(key)
+        return entry
+
+
+def _response_cache_put(key: _CacheKey, entry: "JobResult") -> None:
+    with _RESPONSE_LOCK:
+        _RESPONSE_CACHE[key] = entry
+        _RESPONSE_CACHE.move_to_end(key)
+        while len(_RESPONSE_CACHE) > _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.popitem(last=False)
+
+
+def _response_cache_drop(key: _CacheKey) -> None:
+    with _RESPONSE_LOCK:
+        _RESPONSE_CACHE.pop(key, None)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pool_cached(
+    pool_path: Optional[str],
+    pool_mtime_ns: int,
+    extra_texts: Tuple[str, ...],
+    extra_styles: Tuple[str, ...],
+    extra_tags: Tuple[str, ...],
+    blacklist: Tuple[str, ...],
+    sensitive_words: Tuple[str, ...],
+) -> PromptPool:
+    """构建基准文案池，相同输入（含外部文件修改时间）直接复用缓存结果。"""
+
+    pool = load_prompt_pool(Path(pool_path)) if pool_path else load_prompt_pool()
+    pool.extend_texts(extra_texts)
+    pool.extend_styles(extra_styles)
+    pool.extend_tags(extra_tags)
+    pool.add_blacklist(blacklist)
+    pool.add_sensitive_words(sensitive_words)
+    pool.warm_up()
+    return pool
+
+
+def _sha256_file(path: Path) -> str:
+    """计算文件的 SHA-256：常规大小的文件 mmap 后一次性哈希，超大文件流式读取。"""
+
+    with path.open("rb", buffering=0) as fp:
+        fd = fp.fileno()
+        if hasattr(os, "posix_fadvise"):
+            # 提示内核按顺序预读整个文件，减少哈希读取时的等待
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        size = os.fstat(fd).st_size
+        if 0 < size <= _HASH_SINGLE_SHOT_LIMIT:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(fp, "sha256").hexdigest()
+        sha = hashlib.sha256()
+        buffer = bytearray(_HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = fp.readinto(buffer)
+            if not size:
+                break
+            sha.update(view[:size])
+        return sha.hexdigest()
+
+
+def hash_prefix(algorithm: str) -> str:
+    """返回哈希串的算法前缀：SHA-256 沿用历史格式不带前缀，其余算法为 "<算法>:"。"""
+
+    return "" if algorithm == "sha256" else f"{algorithm}:"
+
+
+def hash_matches(file_hash: str, algorithm: str) -> bool:
+    """判断哈希串是否由指定算法生成，不同算法的哈希之间不做去重比较。"""
+
+    prefix = hash_prefix(algorithm)
+    return file_hash.startswith(prefix) if prefix else ":" not in file_hash
+
+
+def _hash_file(path: Path, algorithm: str) -> str:
+    """按配置的算法计算产物哈希：blake3 为带前缀的多线程 BLAKE3 摘要，sha256 为十六进制串。"""
+
+    if algorithm == "blake3":
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        hasher.update_mmap(str(path))
+        return f"blake3:{hasher.hexdigest()}"
+    return _sha256_file(path)
+
+
+def _move_and_hash(source: Path, target: Path, algorithm: str) -> str:
+    """跨设备移动时边复制边计算哈希，避免复制完成后再整读一遍文件。"""
+
+    hasher = blake3.blake3() if algorithm == "blake3" else hashlib.sha256()
+    buffer = bytearray(_HASH_BUFFER_SIZE)
+    view = memoryview(buffer)
+    try:
+        with source.open("rb", buffering=0) as reader, target.open("wb") as writer:
+            while True:
+                size = reader.readinto(buffer)
+                if not size:
+                    break
+                chunk = view[:size]
+                hasher.update(chunk)
+                writer.write(chunk)
+        shutil.copystat(source, target)
+    except BaseException:
+        target.unlink(missing_ok=True)
+        raise
+    source.unlink()
+    return f"{hash_prefix(algorithm)}{hasher.hexdigest()}"
+
+
+def _place_output(source: Path, target: Path, algorithm: str) -> Optional[str]:
+    """将成品移入输出目录：同一文件系统直接 rename；跨设备时复制并顺带返回文件哈希。"""
+
+    try:
+        os.replace(source, target)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        return _move_and_hash(Path(source), target, algorithm)
+    return None
 
 
 def _slugify(text: str) -> str:
     """将标题转换为文件名安全的 slug。"""
 
-    normalized = re.sub(r"[^0-9A-Za-z一-龥]+", "-", text)
-    normalized = re.sub(r"-+", "-", normalized).strip("-")
+    normalized = _SLUG_RE.sub("-", text).strip("-")
     return normalized[:24] or "video"
 
 
@@ -55,6 +201,9 @@ class GenerationJob:
     def __init__(self, config: PipelineConfig, prompt_pool: PromptPool) -> None:
         self.config = config
         self.prompt_pool = prompt_pool
+        self.hash_algorithm = config.scheduler.hash_algorithm
+        if self.hash_algorithm == "blake3" and blake3 is None:
+            raise RuntimeError("scheduler.hash_algorithm 配置为 blake3，但未安装 blake3 依赖。")
         self.txt2img = Txt2ImgGenerator(config)
         self.img2vid = Img2VidGenerator(config)
 
@@ -63,41 +212,86 @@ class GenerationJob:
         """加载配置并初始化依赖。"""
 
         config = load_config(config_path)
-        pool = load_prompt_pool(config.prompt_pool_path) if config.prompt_pool_path else load_prompt_pool()
-        pool.extend_texts(config.prompts.extra_texts)
-        pool.extend_styles(config.prompts.extra_styles)
-        pool.extend_tags(config.prompts.extra_tags)
-        pool.add_blacklist(config.prompts.blacklist_topics)
-        pool.add_sensitive_words(config.prompts.sensitive_words)
-        return cls(config=config, prompt_pool=pool)
+        pool_path = config.prompt_pool_path
+        pool_mtime_ns = 0
+        if pool_path is not None:
+            try:
+                pool_mtime_ns = pool_path.stat().st_mtime_ns
+            except FileNotFoundError:
+                pool_mtime_ns = -1
+        prompts = config.prompts
+        baseline = _load_pool_cached(
+            str(pool_path) if pool_path is not None else None,
+            pool_mtime_ns,
+            tuple(prompts.extra_texts),
+            tuple(prompts.extra_styles),
+            tuple(prompts.extra_tags),
+            tuple(prompts.blacklist_topics),
+            tuple(prompts.sensitive_words),
+        )
+        return cls(config=config, prompt_pool=baseline.copy())
 
-    def run(self) -> JobResult:
-        """执行一次完整的生成任务。"""
+    def close(self) -> None:
+        """释放生成后端持有的连接。"""
 
-        start_time = time.perf_counter()
-        candidate = self.prompt_pool.sample(
+        self.txt2img.close()
+
+    def sample_candidate(self) -> PromptCandidate:
+        """按配置从文案池采样一条候选，供调度器在派发前查重。"""
+
+        return self.prompt_pool.sample(
             max_title=self.config.prompts.max_title_length,
             max_desc=self.config.prompts.max_desc_length,
             max_tags=self.config.prompts.max_tags,
             sampling_cfg=self.config.raw_data.get("sampling", {}),
         )
+
+    def run(self, candidate: Optional[PromptCandidate] = None) -> JobResult:
+        """执行一次完整的生成任务；未传入候选时自行采样。"""
+
+        start_time = time.perf_counter()
+        if candidate is None:
+            candidate = self.sample_candidate()
         console.log(f"[bold cyan]选定 Prompt：[/bold cyan]{candidate.prompt}")
 
+        negative_prompt = self.config.raw_data.get("sd", {}).get("negative_prompt", "")
+        cache_key: _CacheKey = (
+            candidate.prompt,
+            candidate.title,
+            negative_prompt,
+            candidate.seed,
+            self.config.sd.backend,
+            self.config.animate.backend,
+        )
+        cached = _response_cache_get(cache_key)
+        if cached is not None:
+            if cached.final_video_path.exists():
+                console.log(f"[green]命中已完成任务，直接返回 {cached.final_video_path}，不再重复上传[/green]")
+                return cached
+            _response_cache_drop(cache_key)
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         slug = _slugify(candidate.title)
+        final_name = f"{timestamp}_{slug}.mp4"
+        final_path = self.config.storage.output_dir / final_name
+
         output_tmp_dir = self.config.storage.tmp_dir / f"{timestamp}_{slug}"
         output_tmp_dir.mkdir(parents=True, exist_ok=True)
 
         image_path = output_tmp_dir / "txt2img.json"
         txt2img_result = self.txt2img.generate(
             prompt=candidate.prompt,
-            negative_prompt=self.config.raw_data.get("sd", {}).get("negative_prompt", ""),
+            negative_prompt=negative_prompt,
             output_path=image_path,
             seed=candidate.seed,
         )
+        # 任务对象会被 pickle 到工作进程，缓冲的 dry-run 记录需随本次任务落盘
+        self.txt2img.flush_dry_run()
 
         video_path = output_tmp_dir / "img2vid.mp4"
-        img2vid_result = self.img2vid.generate(image_path=txt2img_result.image_path, output_path=video_path, seed=candidate.seed)
+        img2vid_result = self.img2vid.generate(
+            image_path=txt2img_result.image_path, output_path=video_path, seed=candidate.seed
+        )
 
         processed_path = auto_postprocess(
             config=self.config,
@@ -106,10 +300,7 @@ class GenerationJob:
             enable_subtitle=self.config.raw_data.get("postprocess", {}).get("subtitle", False),
             enable_watermark=self.config.raw_data.get("postprocess", {}).get("watermark", False),
         )
-
-        final_name = f"{timestamp}_{slug}.mp4"
-        final_path = self.config.storage.output_dir / final_name
-        shutil.move(processed_path, final_path)
+        moved_hash = _place_output(processed_path, final_path, self.hash_algorithm)
 
         cover_path = None
         if self.config.video.cover_export:
@@ -117,13 +308,9 @@ class GenerationJob:
             if potential_cover.exists():
                 cover_path = potential_cover
 
-        file_hash = ""
-        if final_path.exists():
-            sha = hashlib.sha256()
-            with final_path.open("rb") as fp:
-                for chunk in iter(lambda: fp.read(1024 * 1024), b""):
-                    sha.update(chunk)
-            file_hash = sha.hexdigest()
+        file_hash = moved_hash or ""
+        if not file_hash and final_path.exists():
+            file_hash = _hash_file(final_path, self.hash_algorithm)
 
         metadata = {
             "prompt": candidate.prompt,
@@ -134,6 +321,8 @@ class GenerationJob:
             "sd_backend": self.config.sd.backend,
             "video_backend": self.config.animate.backend,
         }
+        if img2vid_result.metadata:
+            metadata["video_meta"] = img2vid_result.metadata
 
         upload_metadata = UploadMetadata(
             title=candidate.title,
@@ -146,7 +335,7 @@ class GenerationJob:
         duration = time.perf_counter() - start_time
         console.log(f"[green]任务完成，用时 {duration:.2f}s，输出文件 {final_path}[/green]")
 
-        return JobResult(
+        result = JobResult(
             prompt=candidate,
             image_path=txt2img_result.image_path,
             raw_video_path=img2vid_result.video_path,
@@ -158,6 +347,10 @@ class GenerationJob:
             metadata=metadata,
             success=True,
         )
+        # 上传失败的任务不缓存，以便再次运行时重新上传
+        if upload_result.success:
+            _response_cache_put(cache_key, result)
+        return result
 
 
-__all__ = ["GenerationJob", "JobResult"]
+__all__ = ["GenerationJob", "JobResult", "hash_matches", "hash_prefix"]
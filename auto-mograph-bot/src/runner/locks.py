@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import fcntl
 import os
+import threading
 import time
 from pathlib import Path
-from typing import Optional
+from typing import IO, List, Optional, Sequence, Tuple
 
 
 class FileLock:
@@ -22,17 +23,57 @@ class FileLock:
         self._file = None
 
     def __enter__(self) -> "FileLock":
-        start = time.time()
-        self._file = open(self.path, "w", encoding="utf-8")
-        while True:
+        if self.try_acquire():
+            return self
+        handle = open(self.path, "w", encoding="utf-8")
+        if not self._wait_blocking(handle):
+            raise TimeoutError("等待资源锁超时")
+        self._file = handle
+        return self
+
+    def try_acquire(self) -> bool:
+        """非阻塞地尝试获取锁，成功返回 True。"""
+
+        handle = open(self.path, "w", encoding="utf-8")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+        self._file = handle
+        return True
+
+    def _wait_blocking(self, handle: IO[str]) -> bool:
+        """在后台线程中阻塞等待锁，释放时由内核立即唤醒；超时后由该线程负责善后。"""
+
+        state = threading.Lock()
+        acquired = False
+        abandoned = False
+
+        def waiter() -> None:
+            nonlocal acquired
             try:
-                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                return self
-            except BlockingIOError:
-                if time.time() - start > self.timeout:
-                    self._file.close()
-                    raise TimeoutError("等待资源锁超时")
-                time.sleep(0.5)
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            except OSError:
+                return
+            with state:
+                if not abandoned:
+                    acquired = True
+                    return
+            # 调用方已超时放弃，拿到锁后立即归还
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+
+        thread = threading.Thread(target=waiter, name="file-lock-wait", daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+        with state:
+            if acquired:
+                return True
+            abandoned = True
+            if not thread.is_alive():
+                handle.close()
+        return False
 
     def __exit__(self, exc_type, exc, tb) -> None:  # noqa: D401
         """释放锁并关闭文件。"""
@@ -43,4 +84,54 @@ class FileLock:
             self._file = None
 
 
-__all__ = ["FileLock"]
+def device_lock_path(base_path: os.PathLike[str] | str, device_id: int) -> Path:
+    """根据基础锁路径生成单卡锁文件路径，如 locks/gpu.lock -> locks/gpu_0.lock。"""
+
+    base = Path(base_path)
+    return base.with_name(f"{base.stem}_{device_id}{base.suffix}")
+
+
+class DeviceLock:
+    """多 GPU 设备锁：每张卡一个锁文件，获取任意一张空闲卡即可运行。"""
+
+    def __init__(
+        self,
+        base_path: os.PathLike[str] | str,
+        device_ids: Sequence[int],
+        timeout: float = 60.0,
+    ) -> None:
+        if not device_ids:
+            raise ValueError("device_ids 不能为空")
+        self.timeout = timeout
+        self._locks: List[Tuple[int, FileLock]] = [
+            (device_id, FileLock(device_lock_path(base_path, device_id), timeout)) for device_id in device_ids
+        ]
+        self._held: Optional[FileLock] = None
+        self.device_id: Optional[int] = None
+
+    def __enter__(self) -> "DeviceLock":
+        deadline = time.monotonic() + self.timeout
+        delay = 0.01
+        while True:
+            for device_id, lock in self._locks:
+                if lock.try_acquire():
+                    self._held = lock
+                    self.device_id = device_id
+                    return self
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("等待资源锁超时")
+            # 多个锁文件无法同时阻塞等待，采用指数退避轮询
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 0.5)
+
+    def __exit__(self, exc_type, exc, tb) -> None:  # noqa: D401
+        """释放已占用的设备锁。"""
+
+        if self._held is not None:
+            self._held.__exit__(exc_type, exc, tb)
+            self._held = None
+            self.device_id = None
+
+
+__all__ = ["DeviceLock", "FileLock", "device_lock_path"]
@@ -2,20 +2,132 @@
 
 from __future__ import annotations
 
+import contextlib
 import json
+import mmap
+import multiprocessing
+import os
+import pickle
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Dict, List, Optional, Set
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, BinaryIO, Callable, ContextManager, Dict, List, Optional, Sequence, Set, Tuple
 
-from rich.console import Console
+try:  # noqa: SIM105
+    import orjson  # type: ignore
+except Exception:  # noqa: BLE001
+    orjson = None  # type: ignore[assignment]
+
+try:  # noqa: SIM105
+    import torch  # type: ignore
+except Exception:  # noqa: BLE001
+    torch = None  # type: ignore[assignment]
 
 from ..config import PipelineConfig
-from ..logging import get_logger, log_resource_snapshot
+from ..logging import console, get_logger, init_logging, log_resource_snapshot
 from ..system import get_cpu_cores, get_gpu_info
-from .job import GenerationJob, JobResult
-from .locks import FileLock
+from ..prompts.pool import PromptCandidate
+from ..sd.txt2img import configure_sd_retry
+from ..video.ffmpeg_utils import configure_ffmpeg_retry
+from .job import GenerationJob, JobResult, hash_matches
+from .locks import DeviceLock, FileLock
+
+_loads = orjson.loads if orjson is not None else json.loads
+_DECODE_ERRORS = (ValueError,)  # orjson.JSONDecodeError 与 json.JSONDecodeError 均继承 ValueError
+
+
+def _dumps(record: Dict[str, object]) -> bytes:
+    """将索引记录序列化为 UTF-8 JSON 字节串，优先使用 orjson。"""
+
+    if orjson is not None:
+        return orjson.dumps(record)
+    return json.dumps(record, ensure_ascii=False).encode("utf-8")
+
+
+_MAX_RESAMPLE = 8  # 派发前遇到重复 (prompt, seed) 时的最大重采样次数
+
+_WORKER_JOB: Optional[GenerationJob] = None
+_WORKER_DEVICE: Optional[int] = None
+
+
+def _worker_init(
+    log_path: str,
+    retry_cfg: Dict[str, Any],
+    job_bytes: bytes,
+    slot_counter: Any,
+    gpu_ids: Sequence[int],
+) -> None:
+    """子进程初始化：绑定 GPU、恢复日志与重试配置后，再还原父进程传入的任务实例，供后续任务复用。
+
+    CUDA 只在初始化时读取 CUDA_VISIBLE_DEVICES，因此每个工作进程在启动时按序号绑定一张卡，
+    并且先设置环境变量再反序列化任务，之后该进程内不再修改。spawn 出的进程不会执行父进程的
+    load_config，结构化日志路径与 SD/FFmpeg 重试策略需在此重新应用。
+    """
+
+    global _WORKER_JOB, _WORKER_DEVICE
+    if gpu_ids:
+        with slot_counter.get_lock():
+            slot = slot_counter.value
+            slot_counter.value += 1
+        _WORKER_DEVICE = gpu_ids[slot % len(gpu_ids)]
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(_WORKER_DEVICE)
+    init_logging(log_path)
+    configure_sd_retry(retry_cfg)
+    configure_ffmpeg_retry(retry_cfg)
+    _WORKER_JOB = pickle.loads(job_bytes)
 
-console = Console()
+
+def _device_lock(lock_path: str, gpu_ids: Sequence[int]) -> FileLock | DeviceLock:
+    """配置了 gpu_ids 时按卡加锁，否则沿用单一全局锁。"""
+
+    if gpu_ids:
+        return DeviceLock(lock_path, gpu_ids)
+    return FileLock(lock_path)
+
+
+def _thread_device(device_id: Optional[int]) -> ContextManager[Any]:
+    """线程模式下切换当前线程的 PyTorch 设备；torch 的当前设备是线程局部的，不影响其他线程。"""
+
+    if device_id is None or torch is None or not torch.cuda.is_available():  # type: ignore[attr-defined]
+        return contextlib.nullcontext()
+    return torch.cuda.device(device_id)  # type: ignore[attr-defined]
+
+
+def _run_job_with_retry(
+    job: Optional[GenerationJob],
+    candidate: Optional[PromptCandidate],
+    max_retries: int,
+    lock_path: str,
+    gpu_ids: Sequence[int],
+    cooldown_sec: float,
+) -> Optional[JobResult]:
+    """在锁保护下执行任务，失败时冷却后以同一候选重试；job 为 None 时使用子进程初始化的实例。
+
+    进程模式下只锁定本进程绑定的那张卡；线程模式下任取一张空闲卡，并通过 torch 按线程切换设备，
+    两种模式都不在任务级别修改环境变量。
+    """
+
+    if job is None:
+        job = _WORKER_JOB
+        if job is None:
+            raise RuntimeError("任务进程未初始化")
+        if _WORKER_DEVICE is not None:
+            gpu_ids = (_WORKER_DEVICE,)
+        thread_mode = False
+    else:
+        thread_mode = True
+    logger = get_logger(__name__)
+    for attempt in range(1, max_retries + 2):
+        try:
+            with _device_lock(lock_path, gpu_ids) as lock:
+                device_id = getattr(lock, "device_id", None) if thread_mode else None
+                with _thread_device(device_id):
+                    return job.run(candidate)
+        except Exception as exc:  # noqa: BLE001
+            console.log(f"[red]任务执行失败（第 {attempt} 次）：{exc}[/red]")
+            logger.error("任务执行失败", exc_info=exc)
+            time.sleep(cooldown_sec)
+    return None
 
 
 class GenerationScheduler:
@@ -25,22 +137,40 @@ class GenerationScheduler:
         self.config = config
         self.job_factory = job_factory
         self.index_file = config.scheduler.index_file
+        self.seen_prompts: Set[Tuple[str, int]] = set()
         self.completed_hashes: Set[str] = self._load_existing_hashes()
         self.index_file.parent.mkdir(parents=True, exist_ok=True)
         self.logger = get_logger(__name__)
+        self._index_fp: Optional[BinaryIO] = None
+        self._index_lock = threading.Lock()
+        self._job: Optional[GenerationJob] = None
+        self._job_lock = threading.Lock()
 
     def _load_existing_hashes(self) -> Set[str]:
+        """读取索引中的历史记录，只保留与当前哈希算法一致的哈希参与去重。"""
+
+        algorithm = self.config.scheduler.hash_algorithm
         hashes: Set[str] = set()
-        if not self.index_file.exists():
+        try:
+            fp = self.index_file.open("rb")
+        except FileNotFoundError:
             return hashes
-        with self.index_file.open("r", encoding="utf-8") as fp:
-            for line in fp:
-                try:
-                    record = json.loads(line)
-                    if "hash" in record:
-                        hashes.add(record["hash"])
-                except json.JSONDecodeError:
-                    continue
+        with fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                return hashes
+            with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for line in iter(mapped.readline, b""):
+                    try:
+                        record = _loads(line)
+                    except _DECODE_ERRORS:
+                        continue
+                    if not isinstance(record, dict) or "hash" not in record:
+                        continue
+                    if isinstance(record.get("prompt"), str) and isinstance(record.get("seed"), int):
+                        self.seen_prompts.add((record["prompt"], record["seed"]))
+                    if not isinstance(record["hash"], str) or not hash_matches(record["hash"], algorithm):
+                        continue
+                    hashes.add(record["hash"])
         return hashes
 
     def _append_index(self, result: JobResult) -> None:
@@ -61,19 +191,74 @@ class GenerationScheduler:
                 "draft_url": result.upload_result.draft_url,
             },
         }
-        with self.index_file.open("a", encoding="utf-8") as fp:
-            fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        video_meta = result.metadata.get("video_meta")
+        if video_meta:
+            record["video_meta"] = video_meta
+        line = _dumps(record) + b"\n"
+        with self._index_lock:
+            if self._index_fp is None:
+                self._index_fp = self.index_file.open("ab", buffering=1 << 16)
+            self._index_fp.write(line)
 
-    def _run_single(self, attempt: int, lock_path: str) -> Optional[JobResult]:
-        job = self.job_factory()
-        try:
-            with FileLock(lock_path):
-                result = job.run()
-        except Exception as exc:  # noqa: BLE001
-            console.log(f"[red]任务执行失败（第 {attempt} 次）：{exc}[/red]")
-            self.logger.error("任务执行失败", exc_info=exc)
-            time.sleep(self.config.scheduler.cooldown_sec)
-            return None
+    def flush_index(self) -> None:
+        """将缓冲中的索引记录写入磁盘。"""
+
+        with self._index_lock:
+            if self._index_fp is not None:
+                self._index_fp.flush()
+
+    def close(self) -> None:
+        """刷新并关闭索引文件句柄，并释放任务实例持有的连接。"""
+
+        with self._index_lock:
+            if self._index_fp is not None:
+                self._index_fp.close()
+                self._index_fp = None
+        with self._job_lock:
+            if self._job is not None:
+                self._job.close()
+
+    def _shared_job(self) -> GenerationJob:
+        """首次调用时通过 job_factory 构建任务实例，之后各次尝试复用同一实例及其后端。"""
+
+        with self._job_lock:
+            if self._job is None:
+                self._job = self.job_factory()
+            return self._job
+
+    def _dispatch_candidates(self, job: GenerationJob, count: int) -> List[PromptCandidate]:
+        """在父进程中统一采样，重复的 (prompt, seed) 在派发前重采样，仍重复或采样失败则不再派发。"""
+
+        candidates: List[PromptCandidate] = []
+        skipped = 0
+        failed = 0
+        for _ in range(count):
+            for _attempt in range(_MAX_RESAMPLE):
+                try:
+                    candidate = job.sample_candidate()
+                except RuntimeError as exc:
+                    failed += 1
+                    self.logger.error("采样失败：%s", exc)
+                    break
+                key = (candidate.prompt, candidate.seed)
+                if key not in self.seen_prompts:
+                    self.seen_prompts.add(key)
+                    candidates.append(candidate)
+                    break
+            else:
+                skipped += 1
+        if skipped:
+            notice = f"有 {skipped} 个任务的 Prompt 与已派发任务重复，已跳过。"
+            console.log(f"[yellow]{notice}[/yellow]")
+            self.logger.warning(notice)
+        if failed:
+            notice = f"有 {failed} 个任务采样失败，已跳过。"
+            console.log(f"[yellow]{notice}[/yellow]")
+            self.logger.warning(notice)
+        return candidates
+
+    def _record_result(self, result: JobResult) -> JobResult:
+        """在父进程中完成哈希去重与索引写入。"""
 
         if result.file_hash and result.file_hash in self.completed_hashes:
             console.log("[yellow]检测到重复产物哈希，跳过索引写入。[/yellow]")
@@ -84,6 +269,32 @@ class GenerationScheduler:
         self._append_index(result)
         return result
 
+    def _create_executor(self, concurrency: int) -> Tuple[Executor, Optional[GenerationJob]]:
+        """按配置创建线程池或进程池；返回的任务实例为 None 表示由子进程自行持有。
+
+        并发度为 1 时进程池没有收益，反而每轮都要付出解释器启动与任务反序列化的开销，
+        并丢弃工作进程中的缓存，因此直接使用线程池。
+        """
+
+        job = self._shared_job()
+        if self.config.scheduler.executor == "thread" or concurrency == 1:
+            return ThreadPoolExecutor(max_workers=concurrency), job
+        mp_context = multiprocessing.get_context("spawn")
+        executor = ProcessPoolExecutor(
+            max_workers=concurrency,
+            mp_context=mp_context,
+            initializer=_worker_init,
+            # 任务实例预先序列化，子进程绑定 GPU 之后才反序列化
+            initargs=(
+                str(self.config.logging.jsonl_path),
+                self.config.retry.model_dump(),
+                pickle.dumps(job),
+                mp_context.Value("i", 0),
+                tuple(self.config.scheduler.gpu_ids),
+            ),
+        )
+        return executor, None
+
     def run(self, count: int) -> List[JobResult]:
         """按照配置批量执行任务。"""
 
@@ -135,29 +346,36 @@ class GenerationScheduler:
             concurrency,
         )
 
-        pending = list(range(count))
         lock_path = str(scheduler_cfg.lock_path)
-        while pending:
-            batch = pending[:concurrency]
-            del pending[:concurrency]
-            futures = []
-            with ThreadPoolExecutor(max_workers=concurrency) as executor:
-                for _ in batch:
-                    futures.append(
-                        executor.submit(self._run_with_retry, max_retries, lock_path)
+        gpu_ids = tuple(scheduler_cfg.gpu_ids)
+        # 先在父进程中采样，无可派发任务时不必创建执行器
+        candidates = self._dispatch_candidates(self._shared_job(), count)
+        if not candidates:
+            self.flush_index()
+            return results
+        # 单个执行器贯穿整个批次，空闲工作者立即领取下一个任务；索引与去重只在父进程中处理
+        executor, job = self._create_executor(concurrency)
+        try:
+            with executor:
+                futures = [
+                    executor.submit(
+                        _run_job_with_retry,
+                        job,
+                        candidate,
+                        max_retries,
+                        lock_path,
+                        gpu_ids,
+                        scheduler_cfg.cooldown_sec,
                     )
+                    for candidate in candidates
+                ]
                 for future in as_completed(futures):
                     result = future.result()
                     if result:
-                        results.append(result)
+                        results.append(self._record_result(result))
+        finally:
+            self.flush_index()
         return results
 
-    def _run_with_retry(self, max_retries: int, lock_path: str) -> Optional[JobResult]:
-        for attempt in range(1, max_retries + 2):
-            outcome = self._run_single(attempt, lock_path)
-            if outcome:
-                return outcome
-        return None
-
 
 __all__ = ["GenerationScheduler"]
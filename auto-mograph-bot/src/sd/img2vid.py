@@ -2,20 +2,15 @@
 
 from __future__ import annotations
 
-import json
 import random
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, Optional
 
-from rich.console import Console
-
 from ..config import PipelineConfig
-from ..logging.structlog import log_event
+from ..logging.structlog import console, log_event
 from ..video.ffmpeg_utils import create_placeholder_clip
-from .txt2img import get_retry_cfg, with_retry
-
-console = Console()
+from .txt2img import dump_json, get_retry_cfg, with_retry
 
 
 @dataclass
@@ -24,6 +19,7 @@ class Img2VidResult:
 
     video_path: Path
     seed: int
+    metadata: Dict[str, object] = field(default_factory=dict)
 
 
 class BaseImg2VidBackend:
@@ -49,9 +45,11 @@ class AnimateDiffBackend(BaseImg2VidBackend):
         self,
         model_path: Optional[Path],
         motion_module: Optional[Path],
+        emit_sidecar: bool = False,
     ) -> None:
         self.model_path = model_path
         self.motion_module = motion_module
+        self.emit_sidecar = emit_sidecar
 
     @with_retry
     def generate(
@@ -74,8 +72,8 @@ class AnimateDiffBackend(BaseImg2VidBackend):
             "fps": fps,
             "num_frames": num_frames,
         }
-        meta_path = output_path.with_suffix(".json")
-        meta_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+        if self.emit_sidecar:
+            output_path.with_suffix(".json").write_bytes(dump_json(metadata))
         duration = max(1, num_frames // max(1, fps))
         create_placeholder_clip(output_path, width=width, height=height, duration=duration, fps=fps, text="AnimateDiff 占位")
         console.log(f"[blue]AnimateDiff 占位视频已生成：[/blue]{output_path}")
@@ -87,14 +85,15 @@ class AnimateDiffBackend(BaseImg2VidBackend):
             fps=fps,
             frames=num_frames,
         )
-        return Img2VidResult(video_path=output_path, seed=seed)
+        return Img2VidResult(video_path=output_path, seed=seed, metadata=metadata)
 
 
 class StableVideoDiffusionBackend(BaseImg2VidBackend):
     """Stable Video Diffusion 占位实现。"""
 
-    def __init__(self, model_path: Optional[Path]) -> None:
+    def __init__(self, model_path: Optional[Path], emit_sidecar: bool = False) -> None:
         self.model_path = model_path
+        self.emit_sidecar = emit_sidecar
 
     @with_retry
     def generate(
@@ -116,8 +115,8 @@ class StableVideoDiffusionBackend(BaseImg2VidBackend):
             "fps": fps,
             "num_frames": num_frames,
         }
-        meta_path = output_path.with_suffix(".json")
-        meta_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+        if self.emit_sidecar:
+            output_path.with_suffix(".json").write_bytes(dump_json(metadata))
         duration = max(1, num_frames // max(1, fps))
         create_placeholder_clip(output_path, width=width, height=height, duration=duration, fps=fps, text="SVD 占位")
         console.log(f"[blue]SVD 占位视频已生成：[/blue]{output_path}")
@@ -129,7 +128,7 @@ class StableVideoDiffusionBackend(BaseImg2VidBackend):
             fps=fps,
             frames=num_frames,
         )
-        return Img2VidResult(video_path=output_path, seed=seed)
+        return Img2VidResult(video_path=output_path, seed=seed, metadata=metadata)
 
 
 class Img2VidGenerator:
@@ -139,29 +138,29 @@ class Img2VidGenerator:
         self.config = config
         animate_cfg = config.animate
         if animate_cfg.backend == "svd":
-            self.backend = StableVideoDiffusionBackend(animate_cfg.model_path)
+            self.backend = StableVideoDiffusionBackend(animate_cfg.model_path, animate_cfg.emit_sidecar)
         else:
             self.backend = AnimateDiffBackend(
                 animate_cfg.model_path,
                 animate_cfg.motion_module,
+                animate_cfg.emit_sidecar,
             )
         self.retry_cfg: Dict[str, object] = get_retry_cfg()
 
     def generate(self, image_path: Path, output_path: Path, seed: Optional[int] = None) -> Img2VidResult:
         """执行图生视频流程。"""
 
-        final_seed = seed if seed is not None else random.randint(0, 2**32 - 1)
+        final_seed = seed if seed is not None else random.getrandbits(32)
         animate_cfg = self.config.animate
         if self.config.runtime.dry_run:
             output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(
-                json.dumps({
+            output_path.write_bytes(
+                dump_json({
                     "backend": animate_cfg.backend,
                     "image": str(image_path),
                     "seed": final_seed,
                     "dry_run": True,
-                }, ensure_ascii=False, indent=2),
-                encoding="utf-8",
+                })
             )
             console.log(f"[yellow]Dry-run 模式下未真正推理视频：[/yellow]{output_path}")
             log_event(
@@ -2,23 +2,90 @@
 
 from __future__ import annotations
 
+import asyncio
+import base64
 import functools
+import hashlib
 import json
+import os
 import random
+import re
+import shutil
+import threading
 import time
+from concurrent.futures import Future
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
 
 import httpx
-from rich.console import Console
+try:  # noqa: SIM105
+    import orjson  # type: ignore
+except Exception:  # noqa: BLE001
+    orjson = None  # type: ignore[assignment]
+
+try:  # noqa: SIM105
+    import h2  # type: ignore
+except Exception:  # noqa: BLE001
+    h2 = None  # type: ignore[assignment]
+
+try:  # noqa: SIM105
+    import pybase64  # type: ignore
+except Exception:  # noqa: BLE001
+    pybase64 = None  # type: ignore[assignment]
 
 from ..config import PipelineConfig
-from ..logging.structlog import log_event, log_exception
+from ..logging.structlog import console, log_event, log_exception
+
+if orjson is not None:
+
+    def dump_json(data: Any) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON 字节串，优先使用 orjson。"""
+
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+else:
+
+    def dump_json(data: Any) -> bytes:
+        """序列化为紧凑的 UTF-8 JSON 字节串，未安装 orjson 时使用标准库。"""
+
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+# pybase64 在运行时选择 SSSE3/AVX2 实现，解码数 MB 的图片明显快于标准库
+_b64decode = pybase64.b64decode if pybase64 is not None else base64.b64decode
+_CACHE_SUFFIXES = (".png", ".json")  # 缓存条目保留原始扩展名，查找时按此顺序尝试
+_CACHE_LOW_WATERMARK = 0.8  # 超出上限后淘汰到上限的该比例，减少重复扫描
 
-console = Console()
+_CLIENT_LOCK = threading.Lock()
+# 进程内正在执行的生图请求：请求键 -> Future，相同请求只发起一次
+_INFLIGHT: Dict[str, "Future[Txt2ImgResult]"] = {}
+_INFLIGHT_LOCK = threading.Lock()
+_ENSURED_DIRS: Set[str] = set()  # 本进程已创建过的输出目录，流程中不会删除目录
 
-_RETRY_CFG: Dict[str, Any] = {"max_attempts": 1, "backoff_factor": 1.0, "jitter_ms": 0}
+
+class _NormalizedRetryCfg(dict):
+    """已完成类型转换与取值钳制的只读重试配置，with_retry 收到时不再重复归一化。
+
+    只读保证了可以直接共享同一实例而无需防御性复制；仍是 dict 子类以便随任务对象跨进程 pickle。
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args: Any, **kwargs: Any) -> None:
+        raise TypeError("重试配置只读，请使用 get_retry_cfg_copy() 获取可修改副本")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly  # type: ignore[assignment]
+    clear = pop = popitem = setdefault = update = _readonly  # type: ignore[assignment]
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        return type(self), (dict(self),)
+
+
+_RETRY_CFG: _NormalizedRetryCfg = _NormalizedRetryCfg(
+    {"max_attempts": 1, "backoff_factor": 1.0, "jitter_ms": 0, "max_delay_ms": 30000}
+)
 
 
 def configure_sd_retry(settings: Any) -> None:
@@ -34,72 +101,171 @@ def configure_sd_retry(settings: Any) -> None:
         data = settings
     else:
         data = dict(settings)
-    updated = {
-        "max_attempts": int(data.get("max_attempts", _RETRY_CFG["max_attempts"])),
-        "backoff_factor": float(data.get("backoff_factor", _RETRY_CFG["backoff_factor"])),
-        "jitter_ms": int(data.get("jitter_ms", _RETRY_CFG["jitter_ms"])),
-    }
+    updated = _normalize_retry_cfg(data)
     _RETRY_CFG = updated
-    log_event("retry_config_updated", component="sd", config=updated)
+    log_event("retry_config_updated", component="sd", config=dict(updated))
+
+
+def _ensure_dir(path: Path) -> None:
+    """每个目录只调用一次 makedirs；并发下最多重复创建一次，exist_ok 保证无害，因此无需加锁。"""
+
+    key = str(path)
+    if key in _ENSURED_DIRS:
+        return
+    os.makedirs(key, exist_ok=True)
+    _ENSURED_DIRS.add(key)
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """优先以硬链接放置文件，跨设备等情况下退回复制。"""
+
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _save_webui_image(data: Dict[str, Any], image: Optional[str], output_path: Path) -> Path:
+    """将 base64 图片解码为 PNG，其余字段写为 JSON 元数据；返回图片路径，无图片时返回元数据路径。"""
+
+    png_path = output_path.with_suffix(".png")
+    meta_path = output_path if output_path != png_path else output_path.with_suffix(".json")
+    meta_path.write_bytes(dump_json({key: value for key, value in data.items() if key != "images"}))
+    if not image:
+        return meta_path
+    # 先转为 ASCII 字节（标准库解码 str 时同样会做这一步），data URI 前缀用 memoryview 切掉，避免再复制整段字符串
+    encoded = memoryview(image.encode("ascii"))
+    if image.startswith("data:"):
+        encoded = encoded[image.index(",") + 1 :]
+    decoded = _b64decode(encoded)
+    with open(png_path, "wb", buffering=0) as handle:
+        handle.write(memoryview(decoded))
+    return png_path
+
+
+def _evict_cache(cache_dir: Path, max_bytes: int, target_bytes: Optional[int] = None) -> int:
+    """缓存总量超出上限时，按 mtime 从旧到新删除条目直到不超过 target_bytes（默认即上限），返回淘汰后的缓存总量。"""
+
+    entries: List[Tuple[float, int, str]] = []
+    total = 0
+    for bucket in os.scandir(cache_dir):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    if total <= max_bytes:
+        return total
+    target = max_bytes if target_bytes is None else target_bytes
+    entries.sort()
+    for _mtime, size, path in entries:
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+        if total <= target:
+            break
+    return total
 
 
 def get_retry_cfg() -> Dict[str, Any]:
-    """返回当前的重试配置副本。"""
+    """返回当前的重试配置（只读，无需复制）。"""
+
+    return _RETRY_CFG
+
+
+def get_retry_cfg_copy() -> Dict[str, Any]:
+    """返回当前重试配置的可修改副本。"""
 
     return dict(_RETRY_CFG)
 
 
 def _normalize_retry_cfg(raw: Optional[Any]) -> Dict[str, Any]:
+    if isinstance(raw, _NormalizedRetryCfg):
+        return raw
     if raw is None:
-        return get_retry_cfg()
+        return _RETRY_CFG
     if hasattr(raw, "model_dump"):
         raw = raw.model_dump()
     if isinstance(raw, dict):
         cfg = raw
     else:
         cfg = dict(raw)
-    return {
-        "max_attempts": max(1, int(cfg.get("max_attempts", _RETRY_CFG["max_attempts"]))),
-        "backoff_factor": max(1.0, float(cfg.get("backoff_factor", _RETRY_CFG["backoff_factor"]))),
-        "jitter_ms": max(0, int(cfg.get("jitter_ms", _RETRY_CFG["jitter_ms"]))),
-    }
+    return _NormalizedRetryCfg(
+        {
+            "max_attempts": max(1, int(cfg.get("max_attempts", _RETRY_CFG["max_attempts"]))),
+            "backoff_factor": max(1.0, float(cfg.get("backoff_factor", _RETRY_CFG["backoff_factor"]))),
+            "jitter_ms": max(0, int(cfg.get("jitter_ms", _RETRY_CFG["jitter_ms"]))),
+            "max_delay_ms": max(0, int(cfg.get("max_delay_ms", _RETRY_CFG["max_delay_ms"]))),
+        }
+    )
+
+
+# 规则：(异常类型, 关键词组合（任一组全部出现即命中）, 类别, 建议)，按顺序匹配
+_ErrorRule = Tuple[Tuple[type, ...], Tuple[FrozenSet[str], ...], str, str]
+
+# 一次扫描取出全部关键词；"out of memory" 须排在 "memory" 之前以优先匹配长词
+_SD_ERROR_RE = re.compile(r"timeout|connection refused|out of memory|cuda|memory|unauthorized|401")
+
+_SD_ERROR_RULES_HEAD: Tuple[_ErrorRule, ...] = (
+    ((httpx.TimeoutException,), (frozenset({"timeout"}),), "timeout", "检查网络连通性或适当提高超时时间"),
+    ((httpx.ConnectError,), (frozenset({"connection refused"}),), "conn_error", "确认 SD WebUI 服务已启动且地址配置正确"),
+)
+_SD_STATUS_RULES: Tuple[Tuple[int, int, str, str], ...] = (
+    (429, 429, "rate_limited", "降低并发或延长请求间隔"),
+    (500, 599, "http_5xx", "检查 WebUI 服务端日志或重启服务"),
+    (400, 499, "bad_request", "校验提示词与参数是否符合接口要求"),
+)
+_SD_ERROR_RULES_TAIL: Tuple[_ErrorRule, ...] = (
+    ((httpx.RequestError,), (), "conn_error", "检查网络代理、防火墙或服务监听端口"),
+    ((), (frozenset({"out of memory"}), frozenset({"cuda", "memory"})), "oom", "降低生成分辨率或减少批量大小"),
+    ((), (frozenset({"unauthorized"}), frozenset({"401"})), "auth_error", "确认 WebUI Token 或鉴权配置是否有效"),
+)
+
+
+def _match_error_rules(
+    rules: Tuple[_ErrorRule, ...],
+    err: Exception,
+    found: FrozenSet[str],
+) -> Optional[Tuple[str, str]]:
+    for types, keyword_sets, category, hint in rules:
+        if (types and isinstance(err, types)) or any(keywords <= found for keywords in keyword_sets):
+            return category, hint
+    return None
 
 
 def classify_sd_error(err: Exception) -> Tuple[str, str]:
     """根据异常内容给出错误类别与修复建议。"""
 
-    message = str(err).lower()
-    if isinstance(err, httpx.TimeoutException) or "timeout" in message:
-        return "timeout", "检查网络连通性或适当提高超时时间"
-    if isinstance(err, httpx.ConnectError) or "connection refused" in message:
-        return "conn_error", "确认 SD WebUI 服务已启动且地址配置正确"
+    found = frozenset(_SD_ERROR_RE.findall(str(err).lower()))
+    matched = _match_error_rules(_SD_ERROR_RULES_HEAD, err, found)
+    if matched is not None:
+        return matched
     if isinstance(err, httpx.HTTPStatusError):
         status = err.response.status_code
-        if status == 429:
-            return "rate_limited", "降低并发或延长请求间隔"
-        if 500 <= status < 600:
-            return "http_5xx", "检查 WebUI 服务端日志或重启服务"
-        if 400 <= status < 500:
-            return "bad_request", "校验提示词与参数是否符合接口要求"
-    if isinstance(err, httpx.RequestError):
-        return "conn_error", "检查网络代理、防火墙或服务监听端口"
-    if "out of memory" in message or "cuda" in message and "memory" in message:
-        return "oom", "降低生成分辨率或减少批量大小"
-    if "unauthorized" in message or "401" in message:
-        return "auth_error", "确认 WebUI Token 或鉴权配置是否有效"
+        for low, high, category, hint in _SD_STATUS_RULES:
+            if low <= status <= high:
+                return category, hint
+    matched = _match_error_rules(_SD_ERROR_RULES_TAIL, err, found)
+    if matched is not None:
+        return matched
     return "unknown", "查看 pipeline.jsonl 中的 traceback 以进一步排查"
 
 
 def with_retry(fn):  # type: ignore[no-untyped-def]
-    """为 SD 调用增加指数退避与结构化日志。"""
+    """为 SD 调用增加去相关抖动退避与结构化日志。"""
 
     @functools.wraps(fn)
     def wrapper(*args, **kwargs):  # type: ignore[no-untyped-def]
         cfg = _normalize_retry_cfg(kwargs.pop("_retry_cfg", None))
         log_ctx = kwargs.pop("_log_ctx", {})
-        attempts = max(1, int(cfg.get("max_attempts", 1)))
-        backoff = max(1.0, float(cfg.get("backoff_factor", 1.0)))
-        jitter_ms = max(0, int(cfg.get("jitter_ms", 0)))
+        attempts = cfg["max_attempts"]
+        backoff = cfg["backoff_factor"]
+        jitter_ms = cfg["jitter_ms"]
+        max_delay = max(1.0, cfg["max_delay_ms"] / 1000.0)
         delay = 1.0
         for attempt in range(1, attempts + 1):
             log_event(
@@ -109,10 +275,10 @@ def with_retry(fn):  # type: ignore[no-untyped-def]
                 max_attempts=attempts,
                 **log_ctx,
             )
-            start = time.time()
+            start = time.monotonic()
             try:
                 result = fn(*args, **kwargs)
-                elapsed_ms = int((time.time() - start) * 1000)
+                elapsed_ms = int((time.monotonic() - start) * 1000)
                 log_event(
                     "sd_call_success",
                     fn=fn.__name__,
@@ -122,7 +288,7 @@ def with_retry(fn):  # type: ignore[no-untyped-def]
                 )
                 return result
             except Exception as err:  # noqa: BLE001
-                elapsed_ms = int((time.time() - start) * 1000)
+                elapsed_ms = int((time.monotonic() - start) * 1000)
                 category, hint = classify_sd_error(err)
                 log_exception(
                     "sd_call_fail",
@@ -136,6 +302,8 @@ def with_retry(fn):  # type: ignore[no-untyped-def]
                 )
                 if attempt >= attempts:
                     raise
+                # 去相关抖动：下一次等待在 [1s, 上次等待 * backoff] 内随机取值，并受 max_delay 封顶
+                delay = min(max_delay, random.uniform(1.0, delay * backoff))
                 jitter = random.randint(0, jitter_ms) / 1000.0 if jitter_ms else 0.0
                 sleep_seconds = delay + jitter
                 log_event(
@@ -148,7 +316,6 @@ def with_retry(fn):  # type: ignore[no-untyped-def]
                     **log_ctx,
                 )
                 time.sleep(sleep_seconds)
-                delay *= backoff
         raise RuntimeError("SD call exhausted all retry attempts")
 
     return wrapper
@@ -168,26 +335,31 @@ class BaseTxt2ImgBackend:
     def generate(self, prompt: str, negative_prompt: str, output_path: Path, seed: int) -> Txt2ImgResult:
         raise NotImplementedError
 
+    def close(self) -> None:
+        """释放后端持有的资源，默认无操作。"""
+
 
 class DiffusersTxt2ImgBackend(BaseTxt2ImgBackend):
     """使用 diffusers 本地推理的占位实现。"""
 
-    def __init__(self, model_path: Optional[Path], retry_cfg: Optional[Dict[str, Any]] = None) -> None:
+    def __init__(self, model_path: Optional[Path], retry_cfg: Optional[Dict[str, Any]] = None, steps: int = 30) -> None:
         self.model_path = model_path
+        self.steps = steps
         self.retry_cfg = _normalize_retry_cfg(retry_cfg)
 
     @with_retry
     def generate(self, prompt: str, negative_prompt: str, output_path: Path, seed: int) -> Txt2ImgResult:
         """占位逻辑：写入元数据，实际项目应替换为 diffusers 推理。"""
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_path.parent)
         metadata = {
             "prompt": prompt,
             "negative_prompt": negative_prompt,
             "model_path": str(self.model_path) if self.model_path else None,
             "seed": seed,
+            "steps": self.steps,
         }
-        output_path.write_text(json.dumps(metadata, ensure_ascii=False, indent=2), encoding="utf-8")
+        output_path.write_bytes(dump_json(metadata))
         console.log(f"[green]Diffusers 后端写入占位图片：[/green]{output_path}")
         log_event(
             "sd_diffusers_placeholder",
@@ -201,10 +373,57 @@ class DiffusersTxt2ImgBackend(BaseTxt2ImgBackend):
 class WebUITxt2ImgBackend(BaseTxt2ImgBackend):
     """对接 Stable Diffusion WebUI 的 HTTP API。"""
 
-    def __init__(self, base_url: str, token: Optional[str] = None, retry_cfg: Optional[Dict[str, Any]] = None) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        token: Optional[str] = None,
+        retry_cfg: Optional[Dict[str, Any]] = None,
+        steps: int = 30,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
         self.token = token
+        self.steps = steps
         self.retry_cfg = _normalize_retry_cfg(retry_cfg)
+        self._client: Optional[httpx.Client] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 连接池不可跨进程传递，子进程首次请求时重新建立
+        state = self.__dict__.copy()
+        state["_client"] = None
+        return state
+
+    def _get_client(self) -> httpx.Client:
+        """惰性创建长连接客户端，批量请求复用同一 TCP/TLS 连接。"""
+
+        if self._client is None:
+            with _CLIENT_LOCK:
+                if self._client is None:
+                    headers = {"Content-Type": "application/json"}
+                    if self.token:
+                        headers["Authorization"] = f"Bearer {self.token}"
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        headers=headers,
+                        timeout=httpx.Timeout(60.0, connect=5.0),
+                        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+                        http2=h2 is not None,
+                    )
+        return self._client
+
+    def close(self) -> None:
+        """关闭底层连接池。"""
+
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def _post_txt2img(self, payload: Dict[str, object]) -> Dict[str, Any]:
+        """以流式响应读取接口返回体并直接解析，避免保留额外的响应副本。"""
+
+        with self._get_client().stream("POST", "/sdapi/v1/txt2img", json=payload) as response:
+            response.raise_for_status()
+            body = response.read()
+        return _loads(body)
 
     @with_retry
     def generate(self, prompt: str, negative_prompt: str, output_path: Path, seed: int) -> Txt2ImgResult:
@@ -212,37 +431,86 @@ class WebUITxt2ImgBackend(BaseTxt2ImgBackend):
             "prompt": prompt,
             "negative_prompt": negative_prompt,
             "seed": seed,
-            "steps": 30,
+            "steps": self.steps,
         }
-        headers = {"Content-Type": "application/json"}
-        if self.token:
-            headers["Authorization"] = f"Bearer {self.token}"
-
         console.log(f"[cyan]请求 SD WebUI 接口：[/cyan]{self.base_url}/sdapi/v1/txt2img")
-        output_path.parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(output_path.parent)
 
         try:
-            response = httpx.post(f"{self.base_url}/sdapi/v1/txt2img", headers=headers, json=payload, timeout=60.0)
-            response.raise_for_status()
+            data = self._post_txt2img(payload)
         except Exception as exc:  # noqa: BLE001
             console.log(f"[red]调用 WebUI 失败：{exc}[/red]")
             # 写入失败信息便于调试
-            output_path.write_text(
-                json.dumps({"error": str(exc), "prompt": prompt}, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
+            output_path.write_bytes(dump_json({"error": str(exc), "prompt": prompt}))
             raise
 
-        data = response.json()
-        output_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-        console.log(f"[green]已保存 WebUI 返回占位数据：[/green]{output_path}")
+        images = data.get("images") or [None]
+        image_path = _save_webui_image(data, images[0], output_path)
+        console.log(f"[green]已保存 WebUI 生成结果：[/green]{image_path}")
         log_event(
             "sd_webui_response_saved",
             backend="webui",
-            output=str(output_path),
+            output=str(image_path),
             seed=seed,
         )
-        return Txt2ImgResult(image_path=output_path, seed=seed)
+        return Txt2ImgResult(image_path=image_path, seed=seed)
+
+    @with_retry
+    def generate_batch(
+        self,
+        prompt: str,
+        negative_prompt: str,
+        output_paths: Sequence[Path],
+        seed: int,
+    ) -> List[Txt2ImgResult]:
+        """通过 batch_size 在一次请求中生成多张图（第 i 张种子为 seed + i），再拆分写入各自的输出文件。"""
+
+        payload: Dict[str, object] = {
+            "prompt": prompt,
+            "negative_prompt": negative_prompt,
+            "seed": seed,
+            "steps": self.steps,
+            "batch_size": len(output_paths),
+        }
+        console.log(f"[cyan]批量请求 SD WebUI 接口（{len(output_paths)} 张）：[/cyan]{self.base_url}/sdapi/v1/txt2img")
+        for output_path in output_paths:
+            _ensure_dir(output_path.parent)
+
+        try:
+            data = self._post_txt2img(payload)
+        except Exception as exc:  # noqa: BLE001
+            console.log(f"[red]调用 WebUI 失败：{exc}[/red]")
+            error = dump_json({"error": str(exc), "prompt": prompt})
+            for output_path in output_paths:
+                output_path.write_bytes(error)
+            raise
+
+        images = data.get("images") or []
+        if len(images) < len(output_paths):
+            raise ValueError(f"WebUI 返回图片数 {len(images)} 少于请求数 {len(output_paths)}")
+        info = data.get("info")
+        if isinstance(info, str):
+            try:
+                info = _loads(info)
+            except ValueError:
+                info = None
+        seeds = info.get("all_seeds") if isinstance(info, dict) else None
+        if not isinstance(seeds, list) or len(seeds) < len(output_paths):
+            seeds = [seed + index for index in range(len(output_paths))]
+
+        results: List[Txt2ImgResult] = []
+        for index, output_path in enumerate(output_paths):
+            image_path = _save_webui_image(data, images[index], output_path)
+            results.append(Txt2ImgResult(image_path=image_path, seed=int(seeds[index])))
+        console.log(f"[green]已保存 WebUI 批量生成结果：[/green]{len(results)} 张")
+        log_event(
+            "sd_webui_batch_saved",
+            backend="webui",
+            outputs=[str(result.image_path) for result in results],
+            seed=seed,
+            batch_size=len(output_paths),
+        )
+        return results
 
 
 class Txt2ImgGenerator:
@@ -260,28 +528,120 @@ class Txt2ImgGenerator:
                 sd_config.webui_url or "http://127.0.0.1:7860",
                 sd_config.webui_token,
                 retry_cfg,
+                steps=sd_config.steps,
             )
         else:
-            self.backend = DiffusersTxt2ImgBackend(sd_config.model_path, retry_cfg)
+            self.backend = DiffusersTxt2ImgBackend(sd_config.model_path, retry_cfg, steps=sd_config.steps)
         self.retry_cfg = retry_cfg
+        self._dry_run_buffer: List[Dict[str, Any]] = []
+        # 本进程估算的磁盘缓存总量，None 表示尚未扫描；超出上限时才重新扫描校正并淘汰
+        self._cache_bytes: Optional[int] = None
+
+    def close(self) -> None:
+        """写出未落盘的 dry-run 记录并关闭后端连接。"""
+
+        self.flush_dry_run()
+        self.backend.close()
+
+    def flush_dry_run(self, manifest_path: Optional[Path] = None) -> Optional[Path]:
+        """将缓冲的 dry-run 记录以 NDJSON 追加写入清单，缓冲为空时不触碰文件系统。"""
+
+        # 先换出缓冲再写：并发 generate 追加到旧列表的记录仍会随本次写出
+        records, self._dry_run_buffer = self._dry_run_buffer, []
+        if not records:
+            return None
+        manifest = manifest_path or self.config.storage.tmp_dir / "txt2img_dry_run.ndjson"
+        _ensure_dir(manifest.parent)
+        with manifest.open("ab") as handle:
+            handle.write(b"".join(dump_json(record) + b"\n" for record in records))
+        return manifest
+
+    def _request_key(self, prompt: str, negative_prompt: str, seed: int) -> str:
+        """由影响生成结果的参数计算请求键，供磁盘缓存与在途请求合并共用。"""
+
+        sd_config = self.config.sd
+        return hashlib.blake2b(
+            dump_json({
+                "prompt": prompt,
+                "negative_prompt": negative_prompt,
+                "seed": seed,
+                "steps": sd_config.steps,
+                "backend": sd_config.backend,
+                "model_path": str(sd_config.model_path) if sd_config.model_path else None,
+                "webui_url": sd_config.webui_url,
+            }),
+            digest_size=16,
+        ).hexdigest()
+
+    def _cache_path(self, key: str) -> Optional[Path]:
+        """返回请求键对应的缓存条目路径（不含扩展名），未配置缓存目录时返回 None。"""
+
+        cache_dir = self.config.runtime.cache_dir
+        if cache_dir is None:
+            return None
+        return cache_dir / key[:2] / key
+
+    def _restore_cached(self, cache_path: Path, output_path: Path) -> Optional[Path]:
+        """命中缓存时按原扩展名放置到输出路径并刷新其 mtime（供 LRU 淘汰参考），返回放置后的路径。"""
+
+        for suffix in _CACHE_SUFFIXES:
+            cached = cache_path.with_name(cache_path.name + suffix)
+            try:
+                os.utime(cached)
+            except FileNotFoundError:
+                continue
+            except OSError:
+                return None
+            target = output_path.with_suffix(suffix)
+            try:
+                _ensure_dir(target.parent)
+                _link_or_copy(cached, target)
+            except OSError:
+                return None
+            return target
+        return None
+
+    def _store_cached(self, image_path: Path, cache_path: Path) -> None:
+        """将新生成的结果写入缓存，失败时只记录日志，不影响主流程。"""
+
+        if image_path.suffix not in _CACHE_SUFFIXES:
+            return
+        cache_dir = cache_path.parent.parent
+        max_bytes = self.config.runtime.cache_max_mb * 1024 * 1024
+        try:
+            _ensure_dir(cache_path.parent)
+            entry = cache_path.with_name(cache_path.name + image_path.suffix)
+            _link_or_copy(image_path, entry)
+            if self._cache_bytes is None:
+                self._cache_bytes = _evict_cache(cache_dir, max_bytes)
+                return
+            # 按新条目大小累加，避免每次生成后都全量扫描；其他进程写入的条目在下次扫描时计入
+            self._cache_bytes += entry.stat().st_size
+            if self._cache_bytes > max_bytes:
+                # 一次淘汰到上限的水位线以下，留出余量，避免之后每次写入都触发扫描
+                self._cache_bytes = _evict_cache(cache_dir, max_bytes, int(max_bytes * _CACHE_LOW_WATERMARK))
+        except OSError as exc:
+            log_exception("sd_cache_store_failed", exc, cache=str(cache_path))
 
     def generate(self, prompt: str, negative_prompt: str, output_path: Path, seed: Optional[int] = None) -> Txt2ImgResult:
         """执行文本生图并返回结果。"""
 
-        final_seed = seed if seed is not None else random.randint(0, 2**32 - 1)
+        final_seed = seed if seed is not None else random.getrandbits(32)
         if self.config.runtime.dry_run:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            output_path.write_text(
-                json.dumps({
-                    "prompt": prompt,
-                    "negative_prompt": negative_prompt,
-                    "seed": final_seed,
-                    "backend": self.config.sd.backend,
-                    "dry_run": True,
-                }, ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            console.log(f"[yellow]Dry-run 模式下仅写入文案信息：[/yellow]{output_path}")
+            record = {
+                "prompt": prompt,
+                "negative_prompt": negative_prompt,
+                "seed": final_seed,
+                "backend": self.config.sd.backend,
+                "dry_run": True,
+            }
+            if self.config.runtime.dry_run_per_file:
+                _ensure_dir(output_path.parent)
+                output_path.write_bytes(dump_json(record))
+                console.log(f"[yellow]Dry-run 模式下仅写入文案信息：[/yellow]{output_path}")
+            else:
+                record["output"] = str(output_path)
+                self._dry_run_buffer.append(record)
             log_event(
                 "sd_dry_run",
                 backend=self.config.sd.backend,
@@ -290,7 +650,57 @@ class Txt2ImgGenerator:
             )
             return Txt2ImgResult(image_path=output_path, seed=final_seed)
 
-        return self.backend.generate(
+        key = self._request_key(prompt, negative_prompt, final_seed)
+        with _INFLIGHT_LOCK:
+            pending = _INFLIGHT.get(key)
+            if pending is None:
+                future: "Future[Txt2ImgResult]" = Future()
+                _INFLIGHT[key] = future
+        if pending is not None:
+            # 相同请求正在执行：等待其结果并放置一份到本次的输出路径
+            shared = pending.result()
+            target = output_path.with_suffix(shared.image_path.suffix)
+            if target != shared.image_path:
+                _ensure_dir(target.parent)
+                _link_or_copy(shared.image_path, target)
+            log_event("sd_inflight_shared", backend=self.config.sd.backend, output=str(target), seed=final_seed)
+            return Txt2ImgResult(image_path=target, seed=shared.seed)
+
+        try:
+            result = self._generate_once(prompt, negative_prompt, output_path, final_seed, key)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with _INFLIGHT_LOCK:
+                _INFLIGHT.pop(key, None)
+
+    def _generate_once(
+        self,
+        prompt: str,
+        negative_prompt: str,
+        output_path: Path,
+        final_seed: int,
+        key: str,
+    ) -> Txt2ImgResult:
+        """先查磁盘缓存，未命中时调用后端并写入缓存。"""
+
+        cache_path = self._cache_path(key)
+        restored = self._restore_cached(cache_path, output_path) if cache_path is not None else None
+        if restored is not None:
+            console.log(f"[green]命中文生图缓存：[/green]{restored}")
+            log_event(
+                "sd_cache_hit",
+                backend=self.config.sd.backend,
+                output=str(restored),
+                seed=final_seed,
+            )
+            return Txt2ImgResult(image_path=restored, seed=final_seed)
+
+        result = self.backend.generate(
             prompt=prompt,
             negative_prompt=negative_prompt,
             output_path=output_path,
@@ -301,6 +711,84 @@ class Txt2ImgGenerator:
                 "seed": final_seed,
             },
         )
-
-
-__all__ = ["Txt2ImgGenerator", "Txt2ImgResult", "configure_sd_retry", "with_retry", "get_retry_cfg"]
+        if cache_path is not None:
+            self._store_cached(result.image_path, cache_path)
+        return result
+
+    def generate_many(
+        self,
+        items: Sequence[Tuple[str, str, Path]],
+        seed: Optional[int] = None,
+    ) -> List[Txt2ImgResult]:
+        """批量生成 (prompt, negative_prompt, output_path)，相同提示词合并为一次后端请求，结果按输入顺序返回。"""
+
+        batch_fn = getattr(self.backend, "generate_batch", None)
+        if self.config.runtime.dry_run or batch_fn is None:
+            sequential = [
+                self.generate(prompt, negative_prompt, output_path, seed)
+                for prompt, negative_prompt, output_path in items
+            ]
+            self.flush_dry_run()
+            return sequential
+
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for index, (prompt, negative_prompt, _output_path) in enumerate(items):
+            groups.setdefault((prompt, negative_prompt), []).append(index)
+
+        results: List[Optional[Txt2ImgResult]] = [None] * len(items)
+        for (prompt, negative_prompt), indices in groups.items():
+            base_seed = seed if seed is not None else random.getrandbits(32)
+            batch = batch_fn(
+                prompt=prompt,
+                negative_prompt=negative_prompt,
+                output_paths=[items[index][2] for index in indices],
+                seed=base_seed,
+                _retry_cfg=self.retry_cfg,
+                _log_ctx={
+                    "backend": self.config.sd.backend,
+                    "seed": base_seed,
+                    "batch_size": len(indices),
+                },
+            )
+            for index, result in zip(indices, batch):
+                results[index] = result
+        return [result for result in results if result is not None]
+
+    async def generate_many_async(
+        self,
+        items: Sequence[Tuple[str, str, Path]],
+        seed: Optional[int] = None,
+    ) -> List[Txt2ImgResult]:
+        """并发生成多个 (prompt, negative_prompt, output_path)，在途请求数不超过 sd.max_concurrency。"""
+
+        semaphore = asyncio.Semaphore(self.config.sd.max_concurrency)
+
+        async def _generate_one(prompt: str, negative_prompt: str, output_path: Path) -> Txt2ImgResult:
+            async with semaphore:
+                # 同步 generate 自带重试与日志，放入线程执行并共享同一连接池
+                return await asyncio.to_thread(self.generate, prompt, negative_prompt, output_path, seed)
+
+        results = list(await asyncio.gather(*(_generate_one(*item) for item in items)))
+        self.flush_dry_run()
+        return results
+
+    def generate_concurrent(
+        self,
+        items: Sequence[Tuple[str, str, Path]],
+        seed: Optional[int] = None,
+    ) -> List[Txt2ImgResult]:
+        """generate_many_async 的同步入口。"""
+
+        return asyncio.run(self.generate_many_async(items, seed))
+
+
+__all__ = [
+    "Txt2ImgGenerator",
+    "Txt2ImgResult",
+    "classify_sd_error",
+    "configure_sd_retry",
+    "dump_json",
+    "with_retry",
+    "get_retry_cfg",
+    "get_retry_cfg_copy",
+]
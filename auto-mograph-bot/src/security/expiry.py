@@ -1,21 +1,34 @@
 """Utility helpers for handling secret expiry information."""
 from __future__ import annotations
 
+import time
 from datetime import datetime
+from typing import Optional
 
+_SECONDS_PER_DAY = 86400
 
-def days_left(created_at: datetime, ttl_days: int) -> int:
-    """Return remaining days before expiry, clamping to zero."""
 
-    delta = datetime.now() - created_at
-    remaining = ttl_days - delta.days
-    return max(0, remaining)
+def _elapsed_days(created_at: datetime, now_ts: Optional[float]) -> int:
+    """Whole days since ``created_at``, floored like ``timedelta.days``."""
 
+    if now_ts is None:
+        now_ts = time.time()
+    return int((now_ts - created_at.timestamp()) // _SECONDS_PER_DAY)
 
-def is_expired(created_at: datetime, ttl_days: int) -> bool:
+
+def days_left(created_at: datetime, ttl_days: int, now_ts: Optional[float] = None) -> int:
+    """Return remaining days before expiry, clamping to zero.
+
+    Pass ``now_ts`` (a ``time.time()`` snapshot) when checking many secrets at once.
+    """
+
+    return max(0, ttl_days - _elapsed_days(created_at, now_ts))
+
+
+def is_expired(created_at: datetime, ttl_days: int, now_ts: Optional[float] = None) -> bool:
     """Return ``True`` if the secret has passed its validity window."""
 
-    return (datetime.now() - created_at).days >= ttl_days
+    return _elapsed_days(created_at, now_ts) >= ttl_days
 
 
 __all__ = ["days_left", "is_expired"]
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import functools
 import logging
 import os
 import re
 import subprocess
-from typing import Dict
+import time
+from typing import Dict, Optional, Tuple
 
 try:  # noqa: SIM105
     import torch  # type: ignore
@@ -18,17 +20,25 @@ try:  # noqa: SIM105
 except Exception:  # noqa: BLE001
     psutil = None  # type: ignore[assignment]
 
+try:  # noqa: SIM105
+    import pynvml  # type: ignore
+except Exception:  # noqa: BLE001
+    pynvml = None  # type: ignore[assignment]
+
 LOGGER = logging.getLogger(__name__)
+_NUM_RE = re.compile(r"\d+")
+_GPU_FREE_TTL_SEC = 2  # 空闲显存的刷新间隔；总量与型号在进程内只探测一次
+_free_snapshot: Tuple[int, Optional[int]] = (-1, None)  # (时间窗口编号, 空闲显存 MB)
 
 
 def _parse_nvidia_smi(output: str) -> Dict[str, object]:
-    lines = [line.strip() for line in output.splitlines() if line.strip()]
-    if not lines:
+    # 只解析首块 GPU，跳过开头的空行后取第一行即可
+    first = output.lstrip().partition("\n")[0].strip()
+    if not first:
         raise ValueError("nvidia-smi 未返回有效输出")
-    first = lines[0]
     parts = [part.strip() for part in first.split(",")]
     if len(parts) < 3:
-        matches = re.findall(r"(\d+)", first)
+        matches = _NUM_RE.findall(first)
         if len(matches) >= 2:
             total, free = matches[:2]
             return {"total": int(total), "free": int(free), "name": "NVIDIA"}
@@ -37,8 +47,31 @@ def _parse_nvidia_smi(output: str) -> Dict[str, object]:
     return {"total": int(total), "free": int(free), "name": name or "NVIDIA"}
 
 
-def get_gpu_info() -> Dict[str, object]:
-    """返回首块 GPU 的显存信息，单位 MB。"""
+@functools.lru_cache(maxsize=1)
+def _nvml_handle() -> Optional[object]:
+    """初始化 NVML 并返回首块 GPU 的句柄，不可用时返回 None；每个进程只初始化一次。"""
+
+    if pynvml is None:
+        return None
+    try:
+        pynvml.nvmlInit()
+        return pynvml.nvmlDeviceGetHandleByIndex(0)
+    except Exception as exc:  # noqa: BLE001
+        LOGGER.debug("NVML 初始化失败，回退到 nvidia-smi", exc_info=exc)
+        return None
+
+
+def _probe_gpu_info() -> Dict[str, object]:
+    handle = _nvml_handle()
+    if handle is not None:
+        try:
+            memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+            name = pynvml.nvmlDeviceGetName(handle)
+            if isinstance(name, bytes):
+                name = name.decode("utf-8", "replace")
+            return {"total": int(memory.total) >> 20, "free": int(memory.free) >> 20, "name": name or "NVIDIA"}
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.debug("NVML 查询失败，回退到 nvidia-smi", exc_info=exc)
 
     try:
         result = subprocess.run(  # noqa: S603
@@ -65,8 +98,67 @@ def get_gpu_info() -> Dict[str, object]:
     return {"total": 0, "free": 0, "name": "CPU"}
 
 
+def _free_epoch() -> int:
+    return int(time.monotonic() // _GPU_FREE_TTL_SEC)
+
+
+def _query_free_mb() -> Optional[int]:
+    """仅查询首块 GPU 的空闲显存，失败时返回 None。"""
+
+    handle = _nvml_handle()
+    if handle is not None:
+        try:
+            return int(pynvml.nvmlDeviceGetMemoryInfo(handle).free) >> 20
+        except Exception as exc:  # noqa: BLE001
+            LOGGER.debug("NVML 查询空闲显存失败", exc_info=exc)
+
+    try:
+        result = subprocess.run(  # noqa: S603
+            ["nvidia-smi", "--query-gpu=memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return int(result.stdout.split()[0])
+    except Exception as exc:  # noqa: BLE001
+        LOGGER.debug("nvidia-smi 查询空闲显存失败", exc_info=exc)
+
+    if torch is not None and hasattr(torch, "cuda") and torch.cuda.is_available():  # type: ignore[attr-defined]
+        total = torch.cuda.get_device_properties(0).total_memory // (1024 * 1024)
+        return int(total - torch.cuda.memory_allocated(0) // (1024 * 1024))
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _gpu_static() -> Dict[str, object]:
+    """完整探测一次，同时记下本时间窗口的空闲显存。"""
+
+    global _free_snapshot
+    info = _probe_gpu_info()
+    _free_snapshot = (_free_epoch(), int(info.get("free", 0) or 0))
+    return info
+
+
+def get_gpu_info() -> Dict[str, object]:
+    """返回首块 GPU 的显存信息，单位 MB；总量与型号缓存，空闲显存按时间窗口刷新。"""
+
+    global _free_snapshot
+    info = dict(_gpu_static())
+    if int(info.get("total", 0) or 0) <= 0:
+        return info
+    epoch = _free_epoch()
+    cached_epoch, free = _free_snapshot
+    if cached_epoch != epoch:
+        free = _query_free_mb()
+        _free_snapshot = (epoch, free)
+    if free is not None:
+        info["free"] = free
+    return info
+
+
+@functools.lru_cache(maxsize=1)
 def get_cpu_cores() -> int:
-    """返回物理 CPU 核心数，获取失败时退化为 1。"""
+    """返回物理 CPU 核心数，获取失败时退化为 1；结果在进程内缓存。"""
 
     if psutil is not None:
         cores = psutil.cpu_count(logical=False)
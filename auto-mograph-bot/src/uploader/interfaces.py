@@ -6,9 +6,7 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Optional, Protocol
 
-from rich.console import Console
-
-console = Console()
+from ..logging import console
 
 
 @dataclass
@@ -2,14 +2,52 @@
 
 from __future__ import annotations
 
+import atexit
+import threading
 from pathlib import Path
-
-from rich.console import Console
+from typing import Any, Dict, Tuple
 
 from ...config import PipelineConfig
+from ...logging import console
 from ..interfaces import DraftResult, UploadMetadata
 
-console = Console()
+_SessionKey = Tuple[str, Tuple[Tuple[str, object], ...]]
+
+# 进程内复用的 Appium 会话：(server, capabilities) -> driver；_DRIVERS_LOCK 只保护两张表本身，
+# 每个会话另有一把锁，同一设备上的操作串行执行，不同设备之间互不阻塞
+_DRIVERS: Dict[_SessionKey, Any] = {}
+_SESSION_LOCKS: Dict[_SessionKey, threading.Lock] = {}
+_DRIVERS_LOCK = threading.Lock()
+
+
+def _session_lock(key: _SessionKey) -> threading.Lock:
+    """返回会话专属的锁，首次使用时创建。"""
+
+    with _DRIVERS_LOCK:
+        lock = _SESSION_LOCKS.get(key)
+        if lock is None:
+            lock = _SESSION_LOCKS[key] = threading.Lock()
+        return lock
+
+
+def _quit_quietly(driver: Any) -> None:
+    try:
+        driver.quit()
+    except Exception:  # noqa: BLE001
+        pass
+
+
+def close_sessions() -> None:
+    """关闭所有缓存的 Appium 会话，进程退出时自动调用。"""
+
+    with _DRIVERS_LOCK:
+        drivers = list(_DRIVERS.values())
+        _DRIVERS.clear()
+    for driver in drivers:
+        _quit_quietly(driver)
+
+
+atexit.register(close_sessions)
 
 
 class AndroidAppiumUploader:
@@ -19,11 +57,51 @@ class AndroidAppiumUploader:
 
     def __init__(self, config: PipelineConfig) -> None:
         self.config = config
-        self.server = config.uploader.appium_server or "http://127.0.0.1:4723/wd/hub"
-        self.device_name = config.uploader.device_name or "Android Emulator"
-        self.platform_version = config.uploader.extra.get("platformVersion") if config.uploader.extra else None
-        self.app_package = config.uploader.extra.get("appPackage") if config.uploader.extra else None
-        self.app_activity = config.uploader.extra.get("appActivity") if config.uploader.extra else None
+        uploader_cfg = config.uploader
+        extra = uploader_cfg.extra or {}
+        self.server = uploader_cfg.appium_server or "http://127.0.0.1:4723/wd/hub"
+        self.device_name = uploader_cfg.device_name or "Android Emulator"
+        self.platform_version = extra.get("platformVersion")
+        self.app_package = extra.get("appPackage")
+        self.app_activity = extra.get("appActivity")
+        self._caps: Dict[str, object] = {
+            "platformName": "Android",
+            "deviceName": self.device_name,
+            "appPackage": self.app_package or "com.ss.android.ugc.aweme",
+            "appActivity": self.app_activity or "com.ss.android.ugc.aweme.main.MainActivity",
+            "noReset": True,
+        }
+        if self.platform_version:
+            self._caps["platformVersion"] = self.platform_version
+        self._session_key: _SessionKey = (self.server, tuple(sorted(self._caps.items())))
+
+    def _get_driver(self, webdriver: Any) -> Any:
+        """返回可用的缓存会话，会话失效时重新创建；调用方需持有本会话的锁。"""
+
+        with _DRIVERS_LOCK:
+            driver = _DRIVERS.get(self._session_key)
+        if driver is not None:
+            try:
+                driver.current_activity  # noqa: B018 - 探测会话是否仍然存活
+                return driver
+            except Exception:  # noqa: BLE001
+                console.log("[yellow]Appium 会话已失效，重新连接。[/yellow]")
+                with _DRIVERS_LOCK:
+                    _DRIVERS.pop(self._session_key, None)
+                _quit_quietly(driver)
+        console.log(f"[cyan]连接 Appium Server: {self.server}[/cyan]")
+        driver = webdriver.Remote(self.server, dict(self._caps))
+        with _DRIVERS_LOCK:
+            _DRIVERS[self._session_key] = driver
+        return driver
+
+    def close(self) -> None:
+        """关闭当前配置对应的 Appium 会话，等待该会话上进行中的上传结束。"""
+
+        with _session_lock(self._session_key), _DRIVERS_LOCK:
+            driver = _DRIVERS.pop(self._session_key, None)
+        if driver is not None:
+            _quit_quietly(driver)
 
     def prepare_metadata(self, video_path: Path, metadata: UploadMetadata) -> UploadMetadata:
         console.log("[cyan]Appium Provider 会将标签列表格式化为字符串。[/cyan]")
@@ -36,30 +114,17 @@ class AndroidAppiumUploader:
         except Exception as exc:  # noqa: BLE001
             return DraftResult(success=False, message=f"未安装 appium-python-client: {exc}", provider=self.provider_name)
 
-        desired_capabilities = {
-            "platformName": "Android",
-            "deviceName": self.device_name,
-            "appPackage": self.app_package or "com.ss.android.ugc.aweme",
-            "appActivity": self.app_activity or "com.ss.android.ugc.aweme.main.MainActivity",
-            "noReset": True,
-        }
-        if self.platform_version:
-            desired_capabilities["platformVersion"] = self.platform_version
-
-        console.log(f"[cyan]连接 Appium Server: {self.server}[/cyan]")
-        try:
-            driver = webdriver.Remote(self.server, desired_capabilities)
-        except Exception as exc:  # noqa: BLE001
-            return DraftResult(success=False, message=str(exc), provider=self.provider_name)
+        with _session_lock(self._session_key):
+            try:
+                self._get_driver(webdriver)
+            except Exception as exc:  # noqa: BLE001
+                return DraftResult(success=False, message=str(exc), provider=self.provider_name)
 
-        try:
             console.log("[yellow]以下步骤需根据实际 App UI 自行实现：[/yellow]")
             console.log("1. 将视频推送到模拟器共享目录")
             console.log("2. 在应用内点击发布入口 -> 选择视频 -> 编辑 -> 保存草稿")
             console.log(f"视频路径：{video_path}")
             return DraftResult(success=True, message="模拟 Appium 上传已完成（示意）", provider=self.provider_name)
-        finally:
-            driver.quit()
 
 
-__all__ = ["AndroidAppiumUploader"]
+__all__ = ["AndroidAppiumUploader", "close_sessions"]
@@ -0,0 +1,99 @@
+"""Web 上传 Provider 共享的 Playwright 浏览器，常驻后台事件循环并跨上传复用。"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+from ...logging import console
+
+T = TypeVar("T")
+
+# Chromium 启动参数：关闭沙箱、/dev/shm、GPU、扩展与后台网络，缩短冷启动时间
+_LAUNCH_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+]
+
+# Playwright 对象绑定在创建它们的事件循环上，因此浏览器与循环一起常驻在守护线程中
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_LOCK = threading.Lock()
+_PLAYWRIGHT: Any = None
+_BROWSER: Any = None
+_BROWSER_LOCK: Optional[asyncio.Lock] = None  # 仅在后台循环线程内访问
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """返回后台事件循环，首次调用时在守护线程中启动。"""
+
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="playwright-loop", daemon=True).start()
+            _LOOP = loop
+        return _LOOP
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "Future[T]":
+    """将协程提交到后台事件循环执行。"""
+
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+async def get_browser() -> Any:
+    """返回共享的 Chromium 实例，尚未启动或已断开时重新启动；需在后台事件循环中调用。"""
+
+    global _PLAYWRIGHT, _BROWSER, _BROWSER_LOCK
+    if _BROWSER_LOCK is None:
+        _BROWSER_LOCK = asyncio.Lock()
+    async with _BROWSER_LOCK:
+        if _BROWSER is not None and _BROWSER.is_connected():
+            return _BROWSER
+        from playwright.async_api import async_playwright  # 延迟导入，避免非必需依赖
+
+        if _PLAYWRIGHT is None:
+            _PLAYWRIGHT = await async_playwright().start()
+        console.log("[cyan]启动 Chromium，后续上传将复用该实例。[/cyan]")
+        _BROWSER = await _PLAYWRIGHT.chromium.launch(headless=True, args=_LAUNCH_ARGS)
+        return _BROWSER
+
+
+async def _shutdown() -> None:
+    global _PLAYWRIGHT, _BROWSER, _BROWSER_LOCK
+    browser, playwright = _BROWSER, _PLAYWRIGHT
+    _PLAYWRIGHT = _BROWSER = _BROWSER_LOCK = None
+    for close in (getattr(browser, "close", None), getattr(playwright, "stop", None)):
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception:  # noqa: BLE001
+            pass
+
+
+def close_browser() -> None:
+    """关闭共享浏览器并停止后台事件循环，进程退出时自动调用。"""
+
+    global _LOOP
+    with _LOOP_LOCK:
+        loop, _LOOP = _LOOP, None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout=10)
+    except Exception:  # noqa: BLE001
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(close_browser)
+
+
+__all__ = ["close_browser", "get_browser", "submit"]
@@ -6,13 +6,10 @@ import time
 from pathlib import Path
 from typing import Dict, Optional
 
-from rich.console import Console
-
 from ...config import PipelineConfig
+from ...logging import console
 from ..interfaces import DraftResult, UploadMetadata
 
-console = Console()
-
 
 class TikTokLikeAPIDraftUploader:
     """使用官方接口上传草稿的占位实现，具体参数需自行替换。"""
@@ -3,20 +3,25 @@
 from __future__ import annotations
 
 import asyncio
-import io
+import json
 from pathlib import Path
 
-from rich.console import Console
+try:  # noqa: SIM105
+    import orjson  # type: ignore
+except Exception:  # noqa: BLE001
+    orjson = None  # type: ignore[assignment]
 
 from ...config import PipelineConfig
+from ...logging import console
 from ..interfaces import DraftResult, UploadMetadata
+from .browser import get_browser, submit
 from ui.services.secrets_service import (
     SecretsError,
     SecretsExpiredError,
     SecretsService,
 )
 
-console = Console()
+_loads = orjson.loads if orjson is not None else json.loads
 
 
 class XiaohongshuWebUploader:
@@ -40,11 +45,10 @@ class XiaohongshuWebUploader:
     async def _upload_async(
         self, video_path: Path, metadata: UploadMetadata, state_bytes: bytes
     ) -> DraftResult:
-        from playwright.async_api import async_playwright  # 延迟导入，避免非必需依赖
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(storage_state=io.BytesIO(state_bytes))
+        browser = await get_browser()
+        # 浏览器跨上传复用；上下文携带登录态，每次上传单独创建并关闭
+        context = await browser.new_context(storage_state=_loads(state_bytes))
+        try:
             page = await context.new_page()
             await page.goto("https://creator.xiaohongshu.com/creation")
             await page.wait_for_timeout(500)
@@ -54,29 +58,45 @@ class XiaohongshuWebUploader:
             if metadata.tags:
                 await page.fill("input[placeholder='添加话题']", " ".join(metadata.tags))
             await page.wait_for_timeout(500)
-            await browser.close()
+        finally:
+            await context.close()
         return DraftResult(
             success=True,
             message="已模拟 Web 自动化流程",
             provider=self.provider_name,
         )
 
-    def upload(self, video_path: Path, metadata: UploadMetadata) -> DraftResult:
+    def _load_state(self) -> bytes:
         try:
-            state_bytes = self.secrets_service.load(self.secret_name)
+            return self.secrets_service.load(self.secret_name)
         except SecretsExpiredError as exc:
             self._log_secret_issue(exc)
             raise
         except SecretsError as exc:
             self._log_secret_issue(exc)
             raise
+
+    def _upload_failed(self, video_path: Path, exc: Exception) -> DraftResult:
+        error_log = self.log_dir / f"xiaohongshu_error_{video_path.stem}.log"
+        error_log.write_text(str(exc), encoding="utf-8")
+        console.log(f"[red]Web 上传失败：{exc}[/red]")
+        return DraftResult(success=False, message=str(exc), provider=self.provider_name)
+
+    def upload(self, video_path: Path, metadata: UploadMetadata) -> DraftResult:
+        state_bytes = self._load_state()
+        try:
+            return submit(self._upload_async(video_path, metadata, state_bytes)).result()
+        except Exception as exc:  # noqa: BLE001
+            return self._upload_failed(video_path, exc)
+
+    async def upload_async(self, video_path: Path, metadata: UploadMetadata) -> DraftResult:
+        """在调用方的事件循环中等待上传完成，浏览器操作仍在共享的后台循环上执行。"""
+
+        state_bytes = self._load_state()
         try:
-            return asyncio.run(self._upload_async(video_path, metadata, state_bytes))
+            return await asyncio.wrap_future(submit(self._upload_async(video_path, metadata, state_bytes)))
         except Exception as exc:  # noqa: BLE001
-            error_log = self.log_dir / f"xiaohongshu_error_{video_path.stem}.log"
-            error_log.write_text(str(exc), encoding="utf-8")
-            console.log(f"[red]Web 上传失败：{exc}[/red]")
-            return DraftResult(success=False, message=str(exc), provider=self.provider_name)
+            return self._upload_failed(video_path, exc)
 
     def _log_secret_issue(self, exc: Exception) -> None:
         error_log = self.log_dir / "xiaohongshu_secrets_error.log"
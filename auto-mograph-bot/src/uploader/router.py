@@ -2,20 +2,18 @@
 
 from __future__ import annotations
 
+import asyncio
 import time
 from pathlib import Path
-
-from rich.console import Console
+from typing import Tuple
 
 from ..config import PipelineConfig
-from ..logging.structlog import log_event, log_exception
+from ..logging.structlog import console, log_event, log_exception
 from .interfaces import DraftResult, DummyUploader, UploadMetadata, Uploader
 from .providers.android_appium import AndroidAppiumUploader
 from .providers.tiktok_like_api import TikTokLikeAPIDraftUploader
 from .providers.xiaohongshu_web import XiaohongshuWebUploader
 
-console = Console()
-
 
 def build_uploader(config: PipelineConfig) -> Uploader:
     """根据配置返回对应的上传实现。"""
@@ -30,9 +28,9 @@ def build_uploader(config: PipelineConfig) -> Uploader:
     return DummyUploader()
 
 
-def upload_video(config: PipelineConfig, video_path: Path, metadata: UploadMetadata) -> DraftResult:
-    """统一上传入口：准备元数据并执行上传。"""
-
+def _prepare(
+    config: PipelineConfig, video_path: Path, metadata: UploadMetadata
+) -> Tuple[Uploader, str, UploadMetadata, float]:
     uploader = build_uploader(config)
     provider_name = getattr(uploader, "provider_name", config.uploader.provider or "unknown")
     start = time.time()
@@ -49,30 +47,67 @@ def upload_video(config: PipelineConfig, video_path: Path, metadata: UploadMetad
         provider=provider_name,
         file=str(video_path),
     )
+    return uploader, provider_name, prepared, start
+
+
+def _log_success(
+    config: PipelineConfig, provider_name: str, video_path: Path, start: float, result: DraftResult
+) -> DraftResult:
+    elapsed_ms = int((time.time() - start) * 1000)
+    log_event(
+        "upload_success",
+        platform=config.uploader.target,
+        provider=provider_name,
+        file=str(video_path),
+        elapsed_ms=elapsed_ms,
+        draft_url=result.draft_url,
+    )
+    return result
+
+
+def _log_failure(
+    config: PipelineConfig, provider_name: str, video_path: Path, start: float, exc: Exception
+) -> DraftResult:
+    console.log(f"[red]上传流程出现异常：{exc}[/red]")
+    elapsed_ms = int((time.time() - start) * 1000)
+    log_exception(
+        "upload_fail",
+        exc,
+        platform=config.uploader.target,
+        provider=provider_name,
+        file=str(video_path),
+        elapsed_ms=elapsed_ms,
+    )
+    return DraftResult(success=False, message=str(exc), provider=provider_name)
+
+
+def upload_video(config: PipelineConfig, video_path: Path, metadata: UploadMetadata) -> DraftResult:
+    """统一上传入口：准备元数据并执行上传。"""
+
+    uploader, provider_name, prepared, start = _prepare(config, video_path, metadata)
     try:
         result = uploader.upload(video_path, prepared)
-        elapsed_ms = int((time.time() - start) * 1000)
-        log_event(
-            "upload_success",
-            platform=config.uploader.target,
-            provider=provider_name,
-            file=str(video_path),
-            elapsed_ms=elapsed_ms,
-            draft_url=result.draft_url,
-        )
-        return result
     except Exception as exc:  # noqa: BLE001
-        console.log(f"[red]上传流程出现异常：{exc}[/red]")
-        elapsed_ms = int((time.time() - start) * 1000)
-        log_exception(
-            "upload_fail",
-            exc,
-            platform=config.uploader.target,
-            provider=provider_name,
-            file=str(video_path),
-            elapsed_ms=elapsed_ms,
-        )
-        return DraftResult(success=False, message=str(exc), provider=provider_name)
-
-
-__all__ = ["build_uploader", "upload_video"]
+        return _log_failure(config, provider_name, video_path, start, exc)
+    return _log_success(config, provider_name, video_path, start, result)
+
+
+async def upload_video_async(config: PipelineConfig, video_path: Path, metadata: UploadMetadata) -> DraftResult:
+    """异步上传入口，批量上传时可在同一事件循环中 gather 多个调用。
+
+    提供 upload_async 的 Provider（Web 类）直接等待；其余 Provider 的同步 upload 放入线程执行。
+    """
+
+    uploader, provider_name, prepared, start = _prepare(config, video_path, metadata)
+    upload_async = getattr(uploader, "upload_async", None)
+    try:
+        if upload_async is not None:
+            result = await upload_async(video_path, prepared)
+        else:
+            result = await asyncio.to_thread(uploader.upload, video_path, prepared)
+    except Exception as exc:  # noqa: BLE001
+        return _log_failure(config, provider_name, video_path, start, exc)
+    return _log_success(config, provider_name, video_path, start, result)
+
+
+__all__ = ["build_uploader", "upload_video", "upload_video_async"]
@@ -3,20 +3,28 @@
 from .ffmpeg_utils import (
     create_placeholder_clip,
     encode_image_sequence,
+    encode_image_sequence_async,
     ensure_ffmpeg_available,
     extract_cover,
+    extract_cover_async,
     mux_audio,
+    mux_audio_async,
     run_ffmpeg,
+    run_ffmpeg_async,
 )
 from .postprocess import adapt_vertical, add_subtitles, apply_watermark, auto_postprocess, mix_bgm
 
 __all__ = [
     "create_placeholder_clip",
     "encode_image_sequence",
+    "encode_image_sequence_async",
     "ensure_ffmpeg_available",
     "extract_cover",
+    "extract_cover_async",
     "mux_audio",
+    "mux_audio_async",
     "run_ffmpeg",
+    "run_ffmpeg_async",
     "adapt_vertical",
     "add_subtitles",
     "apply_watermark",
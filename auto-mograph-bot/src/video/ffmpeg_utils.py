@@ -2,19 +2,30 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import os
 import random
+import re
 import shutil
 import subprocess
 import time
+import weakref
 from pathlib import Path
 from typing import Dict, List, Optional, Sequence, Tuple
 
-from rich.console import Console
+from ..logging.structlog import console, log_event, log_exception
 
-from ..logging.structlog import log_event, log_exception
+_STDERR_TAIL_BYTES = 16 * 1024  # 失败时用于分类与日志的 stderr 尾部字节数，超出部分边读边丢弃
+_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
-console = Console()
+# FFMPEG_HWACCEL 取值到硬件 H.264 编码器的映射，未设置或无法识别时使用 libx264
+_HWACCEL_ENCODERS = {
+    "nvenc": "h264_nvenc",
+    "vt": "h264_videotoolbox",
+    "qsv": "h264_qsv",
+    "amf": "h264_amf",
+}
 
 _FFMPEG_RETRY_CFG: Dict[str, object] = {
     "max_attempts": 1,
@@ -68,31 +79,54 @@ def _tail_text(text: str, limit: int = 2000) -> str:
     return text[-limit:]
 
 
+# 按优先级排列的 (关键词, 类别, 建议)，多个类别同时出现时取靠前者
+_FFMPEG_ERROR_RULES: Tuple[Tuple[Tuple[str, ...], str, str], ...] = (
+    (("command not found",), "no_ffmpeg", "确认已安装 FFmpeg 并在 PATH 中可用"),
+    (("no such file or directory", "unable to open"), "file_not_found", "检查输入输出路径是否正确存在"),
+    (("permission denied",), "permission", "检查输出目录及文件权限"),
+    (("no space left", "disk full"), "disk_full", "清理磁盘空间或调整输出目录"),
+    (("codec not found", "unknown encoder"), "codec_missing", "安装所需编解码器或修改编码参数"),
+    (("device or resource busy", "resource temporarily unavailable"), "resource_busy", "确认输出文件未被占用或稍后重试"),
+    (("broken pipe", "epipe"), "broken_pipe", "检查上游数据流或管道写入是否中断"),
+    (("timed out",), "timeout", "检查网络/IO 条件或调高超时时间"),
+    (("input/output error",), "io_error", "检查磁盘健康状态或更换输出位置"),
+)
+# 所有关键词合并为一个正则，对 stderr 只扫描一遍；长关键词在前，避免被短关键词截断
+_FFMPEG_ERROR_RE = re.compile(
+    "|".join(
+        re.escape(keyword)
+        for keyword in sorted(
+            (keyword for keywords, _category, _hint in _FFMPEG_ERROR_RULES for keyword in keywords),
+            key=len,
+            reverse=True,
+        )
+    )
+)
+
+
 def classify_ffmpeg(stderr: str, code: int) -> Tuple[str, str]:
     """根据 FFmpeg 输出推断错误类别与修复建议。"""
 
-    message = (stderr or "").lower()
-    if code == 127 or "command not found" in message:
-        return "no_ffmpeg", "确认已安装 FFmpeg 并在 PATH 中可用"
-    if "no such file or directory" in message or "unable to open" in message:
-        return "file_not_found", "检查输入输出路径是否正确存在"
-    if "permission denied" in message:
-        return "permission", "检查输出目录及文件权限"
-    if "no space left" in message or "disk full" in message:
-        return "disk_full", "清理磁盘空间或调整输出目录"
-    if "codec not found" in message or "unknown encoder" in message:
-        return "codec_missing", "安装所需编解码器或修改编码参数"
-    if "device or resource busy" in message or "resource temporarily unavailable" in message:
-        return "resource_busy", "确认输出文件未被占用或稍后重试"
-    if "broken pipe" in message or "ePIPE" in message:
-        return "broken_pipe", "检查上游数据流或管道写入是否中断"
-    if "connection timed out" in message or "timed out" in message:
-        return "timeout", "检查网络/IO 条件或调高超时时间"
-    if "input/output error" in message:
-        return "io_error", "检查磁盘健康状态或更换输出位置"
+    if code == 127:
+        return _FFMPEG_ERROR_RULES[0][1], _FFMPEG_ERROR_RULES[0][2]
+    found = set(_FFMPEG_ERROR_RE.findall((stderr or "").lower()))
+    if found:
+        for keywords, category, hint in _FFMPEG_ERROR_RULES:
+            if not found.isdisjoint(keywords):
+                return category, hint
     return "unknown", "查看 stderr 详情或命令参数以进一步排查"
 
 
+@functools.lru_cache(maxsize=4)
+def _which_ffmpeg(search_path: Optional[str]) -> str:
+    """按 PATH 查找 FFmpeg，结果按 PATH 取值缓存；未找到时抛出异常，不会被缓存。"""
+
+    ffmpeg_path = shutil.which("ffmpeg", path=search_path)
+    if not ffmpeg_path:
+        raise RuntimeError("未找到 FFmpeg 可执行文件，请安装后将其加入 PATH。")
+    return ffmpeg_path
+
+
 def ensure_ffmpeg_available(explicit_path: Optional[str] = None) -> str:
     """确认 FFmpeg 可用并返回可执行路径。"""
 
@@ -101,100 +135,198 @@ def ensure_ffmpeg_available(explicit_path: Optional[str] = None) -> str:
     env_path = os.getenv("FFMPEG_PATH")
     if env_path:
         return env_path
-    ffmpeg_path = shutil.which("ffmpeg")
-    if not ffmpeg_path:
-        raise RuntimeError("未找到 FFmpeg 可执行文件，请安装后将其加入 PATH。")
-    return ffmpeg_path
+    return _which_ffmpeg(os.environ.get("PATH"))
+
+
+def h264_encoder_args(crf: int, preset: str) -> List[str]:
+    """返回 H.264 视频编码参数；设置 FFMPEG_HWACCEL 时改用对应的硬件编码器并换算质量参数。"""
+
+    encoder = _HWACCEL_ENCODERS.get((os.getenv("FFMPEG_HWACCEL") or "").strip().lower())
+    if encoder == "h264_nvenc":
+        return ["-c:v", encoder, "-preset", "p4", "-rc", "vbr", "-cq", str(crf), "-b:v", "0"]
+    if encoder == "h264_qsv":
+        return ["-c:v", encoder, "-preset", preset, "-global_quality", str(crf)]
+    if encoder == "h264_amf":
+        return ["-c:v", encoder, "-rc", "cqp", "-qp_i", str(crf), "-qp_p", str(crf)]
+    if encoder == "h264_videotoolbox":
+        # VideoToolbox 没有 CRF，-q:v 取值 1-100 且越大质量越高，按 CRF 线性换算
+        return ["-c:v", encoder, "-q:v", str(max(1, min(100, 100 - crf * 2)))]
+    return ["-c:v", "libx264", "-preset", preset, "-crf", str(crf)]
+
+
+def _attempt_count(cfg: Dict[str, object]) -> int:
+    if cfg.get("enabled"):
+        return max(1, int(cfg.get("max_attempts", 1)))
+    return 1
+
+
+def _start_attempt(cmd_str: str, attempt: int, attempts: int) -> float:
+    log_event("ffmpeg_start", command=cmd_str, attempt=attempt, max_attempts=attempts)
+    # 命令已写入结构化日志；Rich 渲染开销较大，仅在 FFMPEG_VERBOSE 时回显到终端，失败信息始终输出
+    if os.getenv("FFMPEG_VERBOSE"):
+        console.log("[cyan]执行 FFmpeg：[/cyan]" + cmd_str)
+    return time.time()
+
+
+def _missing_ffmpeg(err: FileNotFoundError, cmd_str: str, attempt: int, start: float) -> RuntimeError:
+    elapsed_ms = int((time.time() - start) * 1000)
+    category, hint = "no_ffmpeg", "确认已安装 FFmpeg 并在 PATH 中可用"
+    log_exception(
+        "ffmpeg_fail",
+        err,
+        command=cmd_str,
+        attempt=attempt,
+        elapsed_ms=elapsed_ms,
+        category=category,
+        hint=hint,
+    )
+    return RuntimeError("未找到 FFmpeg 可执行文件")
+
+
+def _finish_attempt(
+    cfg: Dict[str, object],
+    cmd_str: str,
+    attempt: int,
+    attempts: int,
+    start: float,
+    code: int,
+    stderr_tail: bytes,
+) -> Optional[float]:
+    """记录一次执行结果：成功返回 None，需要重试时返回等待秒数，不可重试时抛出异常。"""
+
+    elapsed_ms = int((time.time() - start) * 1000)
+
+    if code == 0:
+        log_event("ffmpeg_success", command=cmd_str, attempt=attempt, elapsed_ms=elapsed_ms)
+        return None
+
+    # 只有失败时才解码 stderr，且只解码保留下来的尾部
+    stderr = stderr_tail.decode("utf-8", "replace")
+    console.log(f"[red]FFmpeg 执行失败：{stderr}[/red]")
+    category, hint = classify_ffmpeg(stderr, code)
+    error = RuntimeError(f"FFmpeg 命令失败，退出码 {code}")
+    log_exception(
+        "ffmpeg_fail",
+        error,
+        command=cmd_str,
+        attempt=attempt,
+        elapsed_ms=elapsed_ms,
+        category=category,
+        hint=hint,
+        code=code,
+        stderr=_tail_text(stderr),
+    )
+
+    retryable_codes = set(cfg.get("retryable_exit_codes", []))
+    retryable_categories = {"timeout", "resource_busy", "broken_pipe", "io_error"}
+    should_retry = (
+        cfg.get("enabled")
+        and attempt < attempts
+        and (code in retryable_codes or category in retryable_categories)
+    )
+    if not should_retry:
+        raise error
+
+    jitter_ms = int(cfg.get("jitter_ms", 0))
+    jitter = random.randint(0, jitter_ms) / 1000.0 if jitter_ms else 0.0
+    # 首次重试等待 1 秒，此后每次乘以 backoff_factor
+    sleep_seconds = float(cfg.get("backoff_factor", 1.0)) ** (attempt - 1) + jitter
+    log_event(
+        "ffmpeg_retry",
+        command=cmd_str,
+        attempt=attempt,
+        next_delay_ms=int(sleep_seconds * 1000),
+        category=category,
+        hint=hint,
+        code=code,
+    )
+    return sleep_seconds
 
 
 def run_ffmpeg(command: Sequence[str], *, _retry_cfg: Optional[Dict[str, object]] = None) -> None:
     """运行 FFmpeg 命令并在失败时执行分类与重试。"""
 
     cfg = _normalize_retry_cfg(_retry_cfg)
-    attempts = 1
-    if cfg.get("enabled"):
-        attempts = max(1, int(cfg.get("max_attempts", 1)))
-    delay = 1.0
+    attempts = _attempt_count(cfg)
     cmd_str = " ".join(command)
 
     for attempt in range(1, attempts + 1):
-        log_event("ffmpeg_start", command=cmd_str, attempt=attempt, max_attempts=attempts)
-        console.log("[cyan]执行 FFmpeg：[/cyan]" + cmd_str)
-        start = time.time()
+        start = _start_attempt(cmd_str, attempt, attempts)
         try:
-            process = subprocess.run(command, check=False, capture_output=True, text=True)
+            # stdout 不需要，只剩 stderr 一个管道，直接在当前线程读取不会死锁；内存占用与日志量无关
+            with subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as process:
+                stream = process.stderr
+                assert stream is not None
+                tail = bytearray()
+                for chunk in iter(lambda: stream.read(1 << 16), b""):
+                    tail += chunk
+                    if len(tail) > _STDERR_TAIL_BYTES:
+                        del tail[:-_STDERR_TAIL_BYTES]
+                code = process.wait()
         except FileNotFoundError as err:
-            elapsed_ms = int((time.time() - start) * 1000)
-            category, hint = "no_ffmpeg", "确认已安装 FFmpeg 并在 PATH 中可用"
-            log_exception(
-                "ffmpeg_fail",
-                err,
-                command=cmd_str,
-                attempt=attempt,
-                elapsed_ms=elapsed_ms,
-                category=category,
-                hint=hint,
-            )
-            raise RuntimeError("未找到 FFmpeg 可执行文件") from err
-
-        stdout = process.stdout or ""
-        stderr = process.stderr or ""
-        code = process.returncode
-        elapsed_ms = int((time.time() - start) * 1000)
-
-        if stdout.strip():
-            console.log(stdout)
-
-        if code == 0:
-            log_event("ffmpeg_success", command=cmd_str, attempt=attempt, elapsed_ms=elapsed_ms)
+            raise _missing_ffmpeg(err, cmd_str, attempt, start) from err
+
+        delay = _finish_attempt(cfg, cmd_str, attempt, attempts, start, code, bytes(tail))
+        if delay is None:
             return
+        time.sleep(delay)
 
-        console.log(f"[red]FFmpeg 执行失败：{stderr}[/red]")
-        category, hint = classify_ffmpeg(stderr, code)
-        error = RuntimeError(f"FFmpeg 命令失败，退出码 {code}")
-        log_exception(
-            "ffmpeg_fail",
-            error,
-            command=cmd_str,
-            attempt=attempt,
-            elapsed_ms=elapsed_ms,
-            category=category,
-            hint=hint,
-            code=code,
-            stderr=_tail_text(stderr),
-        )
+    raise RuntimeError("FFmpeg 命令多次重试后仍失败")
 
-        retryable_codes = set(cfg.get("retryable_exit_codes", []))
-        retryable_categories = {"timeout", "resource_busy", "broken_pipe", "io_error"}
-        should_retry = (
-            cfg.get("enabled")
-            and attempt < attempts
-            and (code in retryable_codes or category in retryable_categories)
-        )
 
-        if should_retry:
-            jitter_ms = int(cfg.get("jitter_ms", 0))
-            jitter = random.randint(0, jitter_ms) / 1000.0 if jitter_ms else 0.0
-            sleep_seconds = delay + jitter
-            log_event(
-                "ffmpeg_retry",
-                command=cmd_str,
-                attempt=attempt,
-                next_delay_ms=int(sleep_seconds * 1000),
-                category=category,
-                hint=hint,
-                code=code,
-            )
-            time.sleep(sleep_seconds)
-            delay *= float(cfg.get("backoff_factor", 1.0))
-            continue
+def _ffmpeg_semaphore() -> asyncio.Semaphore:
+    """返回当前事件循环专用的并发上限信号量（asyncio.Semaphore 不能跨事件循环共享）。"""
 
-        raise error
+    loop = asyncio.get_running_loop()
+    semaphore = _SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(1, int(os.getenv("FFMPEG_PARALLEL") or 2)))
+        _SEMAPHORES[loop] = semaphore
+    return semaphore
+
+
+async def _read_stderr_tail(stream: asyncio.StreamReader) -> bytes:
+    # 按块读取而非按行：FFmpeg 的进度行以 \r 分隔，按 \n 读取可能超出 StreamReader 的行长上限
+    tail = bytearray()
+    while chunk := await stream.read(1 << 16):
+        tail += chunk
+        if len(tail) > _STDERR_TAIL_BYTES:
+            del tail[:-_STDERR_TAIL_BYTES]
+    return bytes(tail)
+
+
+async def run_ffmpeg_async(command: Sequence[str], *, _retry_cfg: Optional[Dict[str, object]] = None) -> None:
+    """run_ffmpeg 的异步版本，同一事件循环内同时运行的 FFmpeg 进程数不超过 FFMPEG_PARALLEL（默认 2）。"""
+
+    cfg = _normalize_retry_cfg(_retry_cfg)
+    attempts = _attempt_count(cfg)
+    cmd_str = " ".join(command)
+
+    for attempt in range(1, attempts + 1):
+        async with _ffmpeg_semaphore():
+            start = _start_attempt(cmd_str, attempt, attempts)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError as err:
+                raise _missing_ffmpeg(err, cmd_str, attempt, start) from err
+            assert process.stderr is not None
+            stderr_tail = await _read_stderr_tail(process.stderr)
+            code = await process.wait()
+
+        # 等待重试期间不占用并发名额
+        delay = _finish_attempt(cfg, cmd_str, attempt, attempts, start, code, stderr_tail)
+        if delay is None:
+            return
+        await asyncio.sleep(delay)
 
     raise RuntimeError("FFmpeg 命令多次重试后仍失败")
 
 
-def encode_image_sequence(
+def _encode_image_sequence_command(
     frames_pattern: str,
     output_path: Path,
     fps: int,
@@ -203,47 +335,90 @@ def encode_image_sequence(
     crf: int,
     preset: str,
     bitrate: Optional[str],
-    audio_path: Optional[Path] = None,
-    audio_bitrate: str = "192k",
-) -> Path:
-    """将序列帧编码为 H.264 MP4。"""
-
+    audio_path: Optional[Path],
+    audio_bitrate: str,
+) -> List[str]:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    command: List[str] = [
-        ensure_ffmpeg_available(),
-        "-y",
-        "-framerate",
-        str(fps),
-        "-i",
-        frames_pattern,
-        "-s",
-        f"{width}x{height}",
-        "-c:v",
-        "libx264",
-        "-preset",
-        preset,
-        "-crf",
-        str(crf),
-        "-pix_fmt",
-        "yuv420p",
-    ]
+    command: List[str] = [ensure_ffmpeg_available(), "-y", "-framerate", str(fps), "-i", frames_pattern]
+    # 所有输入放在编码参数之前，否则 -s/-c:v 等会被当作音频输入的参数
+    if audio_path:
+        command.extend(["-i", str(audio_path)])
+    command.extend(["-s", f"{width}x{height}", *h264_encoder_args(crf, preset), "-pix_fmt", "yuv420p"])
     if bitrate:
         command.extend(["-b:v", bitrate])
     if audio_path:
-        command.extend(["-i", str(audio_path), "-c:a", "aac", "-b:a", audio_bitrate])
+        command.extend(["-c:a", "aac", "-b:a", audio_bitrate])
     else:
         command.extend(["-an"])
     command.append(str(output_path))
+    return command
 
-    run_ffmpeg(command)
+
+def encode_image_sequence(
+    frames_pattern: str,
+    output_path: Path,
+    fps: int,
+    width: int,
+    height: int,
+    crf: int,
+    preset: str,
+    bitrate: Optional[str],
+    audio_path: Optional[Path] = None,
+    audio_bitrate: str = "192k",
+) -> Path:
+    """将序列帧编码为 H.264 MP4。"""
+
+    run_ffmpeg(
+        _encode_image_sequence_command(
+            frames_pattern,
+            output_path,
+            fps,
+            width,
+            height,
+            crf,
+            preset,
+            bitrate,
+            audio_path,
+            audio_bitrate,
+        )
+    )
     return output_path
 
 
-def mux_audio(video_path: Path, audio_path: Path, output_path: Path, audio_bitrate: str = "192k") -> Path:
-    """为视频重新混音音频轨。"""
+async def encode_image_sequence_async(
+    frames_pattern: str,
+    output_path: Path,
+    fps: int,
+    width: int,
+    height: int,
+    crf: int,
+    preset: str,
+    bitrate: Optional[str],
+    audio_path: Optional[Path] = None,
+    audio_bitrate: str = "192k",
+) -> Path:
+    """encode_image_sequence 的异步版本，可与其他片段的编码并发执行。"""
+
+    await run_ffmpeg_async(
+        _encode_image_sequence_command(
+            frames_pattern,
+            output_path,
+            fps,
+            width,
+            height,
+            crf,
+            preset,
+            bitrate,
+            audio_path,
+            audio_bitrate,
+        )
+    )
+    return output_path
+
 
+def _mux_audio_command(video_path: Path, audio_path: Path, output_path: Path, audio_bitrate: str) -> List[str]:
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    command = [
+    return [
         ensure_ffmpeg_available(),
         "-y",
         "-i",
@@ -258,15 +433,25 @@ def mux_audio(video_path: Path, audio_path: Path, output_path: Path, audio_bitra
         audio_bitrate,
         str(output_path),
     ]
-    run_ffmpeg(command)
+
+
+def mux_audio(video_path: Path, audio_path: Path, output_path: Path, audio_bitrate: str = "192k") -> Path:
+    """为视频重新混音音频轨。"""
+
+    run_ffmpeg(_mux_audio_command(video_path, audio_path, output_path, audio_bitrate))
     return output_path
 
 
-def extract_cover(video_path: Path, cover_path: Path, timecode: float = 0.0) -> Path:
-    """从视频中截取封面帧。"""
+async def mux_audio_async(video_path: Path, audio_path: Path, output_path: Path, audio_bitrate: str = "192k") -> Path:
+    """mux_audio 的异步版本。"""
+
+    await run_ffmpeg_async(_mux_audio_command(video_path, audio_path, output_path, audio_bitrate))
+    return output_path
+
 
+def _extract_cover_command(video_path: Path, cover_path: Path, timecode: float) -> List[str]:
     cover_path.parent.mkdir(parents=True, exist_ok=True)
-    command = [
+    return [
         ensure_ffmpeg_available(),
         "-y",
         "-ss",
@@ -277,7 +462,19 @@ def extract_cover(video_path: Path, cover_path: Path, timecode: float = 0.0) ->
         "1",
         str(cover_path),
     ]
-    run_ffmpeg(command)
+
+
+def extract_cover(video_path: Path, cover_path: Path, timecode: float = 0.0) -> Path:
+    """从视频中截取封面帧。"""
+
+    run_ffmpeg(_extract_cover_command(video_path, cover_path, timecode))
+    return cover_path
+
+
+async def extract_cover_async(video_path: Path, cover_path: Path, timecode: float = 0.0) -> Path:
+    """extract_cover 的异步版本。"""
+
+    await run_ffmpeg_async(_extract_cover_command(video_path, cover_path, timecode))
     return cover_path
 
 
@@ -301,12 +498,9 @@ def create_placeholder_clip(
         f"color=c=0x1a1a1a:s={width}x{height}:r={fps}:d={duration}",
         "-vf",
         "drawtext=text='" + text.replace("'", "\\'") + "':fontcolor=white:fontsize=64:x=(w-text_w)/2:y=(h-text_h)/2",
-        "-c:v",
-        "libx264",
+        *h264_encoder_args(18, "medium"),
         "-pix_fmt",
         "yuv420p",
-        "-crf",
-        "18",
         str(output_path),
     ]
     run_ffmpeg(command)
@@ -315,10 +509,15 @@ def create_placeholder_clip(
 
 __all__ = [
     "ensure_ffmpeg_available",
+    "h264_encoder_args",
     "run_ffmpeg",
+    "run_ffmpeg_async",
     "encode_image_sequence",
+    "encode_image_sequence_async",
     "mux_audio",
+    "mux_audio_async",
     "extract_cover",
+    "extract_cover_async",
     "create_placeholder_clip",
     "configure_ffmpeg_retry",
 ]
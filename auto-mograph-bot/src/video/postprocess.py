@@ -6,12 +6,9 @@ import random
 from pathlib import Path
 from typing import Optional
 
-from rich.console import Console
-
 from ..config import PipelineConfig
-from .ffmpeg_utils import ensure_ffmpeg_available, run_ffmpeg, extract_cover
-
-console = Console()
+from ..logging import console
+from .ffmpeg_utils import ensure_ffmpeg_available, extract_cover, h264_encoder_args, run_ffmpeg
 
 
 def adapt_vertical(video_path: Path, output_path: Path, width: int, height: int) -> Path:
@@ -25,12 +22,7 @@ def adapt_vertical(video_path: Path, output_path: Path, width: int, height: int)
         str(video_path),
         "-vf",
         f"scale=w={width}:h={height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
-        "-c:v",
-        "libx264",
-        "-crf",
-        "18",
-        "-preset",
-        "medium",
+        *h264_encoder_args(18, "medium"),
         "-an",
         str(output_path),
     ]
@@ -75,7 +75,7 @@ class ConfigEditorView(QWidget):
         """刷新文件列表并重新加载当前文件。"""
 
         try:
-            self.center.reload()
+            self.center.reload(assume_valid=True)
         except Exception:
             pass
         current = self.combo.currentText()
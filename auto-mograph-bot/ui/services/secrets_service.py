@@ -4,10 +4,16 @@ from __future__ import annotations
 import base64
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:  # noqa: SIM105
+    import orjson  # type: ignore
+except Exception:  # noqa: BLE001
+    orjson = None  # type: ignore[assignment]
+
 import keyring
 from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
@@ -15,6 +21,8 @@ from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 from src.security import expiry
 
+_loads = orjson.loads if orjson is not None else json.loads
+
 
 class SecretsError(Exception):
     """密钥存储通用异常。"""
@@ -130,6 +138,7 @@ class SecretsService:
         except SecretsLockedError:
             return []
         result: List[Dict[str, object]] = []
+        now_ts = time.time()
         for name, entry in entries.items():
             try:
                 created_at = datetime.fromisoformat(entry["created_at"])
@@ -141,8 +150,8 @@ class SecretsService:
                     "name": name,
                     "created_at": created_at.isoformat(),
                     "ttl_days": ttl_days,
-                    "days_left": expiry.days_left(created_at, ttl_days),
-                    "is_expired": expiry.is_expired(created_at, ttl_days),
+                    "days_left": expiry.days_left(created_at, ttl_days, now_ts),
+                    "is_expired": expiry.is_expired(created_at, ttl_days, now_ts),
                 }
             )
         result.sort(key=lambda item: item["name"])
@@ -271,8 +280,8 @@ class SecretsService:
         except InvalidToken as exc:
             raise SecretsError("主密码错误或密钥库被篡改。") from exc
         try:
-            return json.loads(data.decode("utf-8"))
-        except json.JSONDecodeError as exc:  # pragma: no cover - 防御性
+            return _loads(data)
+        except ValueError as exc:  # pragma: no cover - 防御性，orjson 与 json 的解码异常均继承 ValueError
             raise SecretsError("密钥库内容损坏。") from exc
 
     # ------------------------------------------------------------------
@@ -7,6 +7,13 @@ from typing import Any, Dict, Iterable, Optional
 import yaml
 from pydantic import BaseModel, ValidationError
 
+try:  # 优先使用 libyaml C 实现，缺失时回退到纯 Python 版本
+    from yaml import CSafeDumper as _SafeDumper
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # pragma: no cover - 取决于 PyYAML 编译选项
+    from yaml import SafeDumper as _SafeDumper  # type: ignore[assignment]
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
 
 class YamlValidationError(Exception):
     """表示 YAML 文件内容不符合预期结构。"""
@@ -21,10 +28,10 @@ def load_yaml_file(path: Path | str) -> Any:
     """加载 YAML 文件并返回 Python 对象。"""
 
     path = Path(path)
-    if not path.exists():
-        raise FileNotFoundError(f"未找到 YAML 文件: {path}")
-    with path.open("r", encoding="utf-8") as handle:
-        return yaml.safe_load(handle) or {}
+    try:
+        return yaml.load(path.read_bytes(), Loader=_SafeLoader) or {}
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(f"未找到 YAML 文件: {path}") from exc
 
 
 def dump_yaml_file(data: Any, path: Path | str) -> None:
@@ -33,7 +40,7 @@ def dump_yaml_file(data: Any, path: Path | str) -> None:
     path = Path(path)
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as handle:
-        yaml.safe_dump(data, handle, allow_unicode=True, sort_keys=False)
+        yaml.dump(data, handle, Dumper=_SafeDumper, allow_unicode=True, sort_keys=False)
 
 
 def validate_yaml_with_model(